@@ -0,0 +1,233 @@
+"""
+Bridge coverage report. Compares the uberon bridges (src/ontology/sources/uberon-bridge-to-*.obo) with the new
+mapping templates (src/robot_templates/*_CCF_to_UBERON.tsv) and the Allen structure graphs
+(src/ontology/sources/N.json) without building sources_merged.owl.
+
+For each atlas structure, reports whether it is mapped in the legacy bridge, the new template, both or neither and
+whether both mappings agree. Mappings are compared as sets of (relation, UBERON term) pairs, ignoring the taxon
+restrictions.
+"""
+
+import os
+import argparse
+import urllib.request
+import pandas as pd
+
+from obo_utils import read_obo_terms, normalize_relation, PART_OF
+from id_codec import CODEC, encode, to_iri
+from relation_validator import read_csv_to_dict
+from structure_graph_utils import read_structure_graph, NAMESPACES, ATLASES
+from mapping_template_validator import STRUCTURE_GRAPH_URL
+
+
+BRIDGES_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../ontology/sources")
+TEMPLATES_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../robot_templates")
+STRUCTURE_GRAPHS_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../ontology/sources")
+REPORT_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../ontology/report/bridge_coverage.tsv")
+
+BRIDGE_FILE = "uberon-bridge-to-{}.obo"
+TEMPLATE_FILE = "{}_CCF_to_UBERON.tsv"
+UBERON = "UBERON"
+
+EQUIVALENT = "equivalent"
+EQUIVALENT_PART_OF = "equivalent part_of"
+SUBCLASS = "subclass"
+SUBCLASS_PART_OF = "subclass part_of"
+
+BOTH = "both"
+LEGACY_ONLY = "legacy only"
+TEMPLATE_ONLY = "template only"
+NEITHER = "neither"
+
+
+def get_bridge_mappings(bridge_path):
+    """
+    Gets UBERON mappings of the atlas terms from the given OBO bridge.
+
+    Params:
+        bridge_path: path of the uberon-bridge-to-*.obo file
+    Returns: dict of encoded atlas term id to set of (relation, encoded UBERON id) pairs
+    """
+    mappings = dict()
+    for term_id, tags in read_obo_terms(bridge_path).items():
+        term_mappings = set()
+        for value in tags.get("intersection_of", []):
+            parts = value.split()
+            if len(parts) == 1:
+                term_mappings.add((EQUIVALENT, encode(parts[0])))
+            elif len(parts) == 2 and normalize_relation(parts[0]) == PART_OF:
+                term_mappings.add((EQUIVALENT_PART_OF, encode(parts[1])))
+        for value in tags.get("relationship", []):
+            parts = value.split()
+            if len(parts) == 2 and normalize_relation(parts[0]) == PART_OF:
+                term_mappings.add((SUBCLASS_PART_OF, encode(parts[1])))
+        for value in tags.get("is_a", []):
+            term_mappings.add((SUBCLASS, encode(value.split()[0])))
+
+        term_mappings = set(mapping for mapping in term_mappings if CODEC.namespace(mapping[1]) == UBERON)
+        if term_mappings:
+            mappings[encode(term_id)] = term_mappings
+    return mappings
+
+
+def get_template_relation(directive, class_type):
+    """
+    Resolves the mapping relation expressed by a ROBOT template column.
+
+    Params:
+        directive: ROBOT template string of the column such as 'SC part_of some %'
+        class_type: CLASS_TYPE value of the row ('subclass' or 'equivalent') used by the 'C' columns
+    Returns: mapping relation or None if the column doesn't define a logical axiom
+    """
+    directive = directive.strip()
+    if directive.startswith("SC "):
+        axiom_type = SUBCLASS
+    elif directive.startswith("EC "):
+        axiom_type = EQUIVALENT
+    elif directive.startswith("C "):
+        axiom_type = EQUIVALENT if class_type == EQUIVALENT else SUBCLASS
+    else:
+        return None
+
+    expression = directive.split(" ", 1)[1].strip()
+    if expression.startswith("part_of some %"):
+        return EQUIVALENT_PART_OF if axiom_type == EQUIVALENT else SUBCLASS_PART_OF
+    return axiom_type
+
+
+def get_template_mappings(template_path):
+    """
+    Gets UBERON mappings of the atlas terms from the given ROBOT template.
+
+    Params:
+        template_path: path of the *_CCF_to_UBERON.tsv template
+    Returns: dict of encoded atlas term id to set of (relation, encoded UBERON id) pairs
+    """
+    headers, records = read_csv_to_dict(template_path, delimiter="\t", generated_ids=True)
+    directives = records[min(records)]
+    class_type_column = next((column for column in directives if directives[column].strip() == "CLASS_TYPE"), None)
+
+    mappings = dict()
+    for row_num in records:
+        term_id = str(records[row_num]["ID"]).strip()
+        if not term_id or term_id == "ID":
+            continue
+        class_type = SUBCLASS
+        if class_type_column:
+            class_type = str(records[row_num][class_type_column]).strip().lower() or SUBCLASS
+        for column, directive in directives.items():
+            value = str(records[row_num].get(column, "")).strip()
+            relation = get_template_relation(directive, class_type)
+            if value and relation:
+                mappings.setdefault(encode(term_id), set()).add((relation, encode(value)))
+    return mappings
+
+
+def get_structure_graph(atlas, structure_graphs_folder):
+    """
+    Reads the structure graph of the given atlas, downloads it from the Allen API if it doesn't exist locally.
+
+    Params:
+        atlas: atlas name such as 'mba'
+        structure_graphs_folder: folder of the structure graph json files
+    Returns: dict of encoded structure id to structure record, None if the atlas has no structure graph
+    """
+    graph_file = next((json_name for json_name, namespace in NAMESPACES.items()
+                       if namespace.endswith("/" + atlas.upper() + "_")), None)
+    if not graph_file:
+        return None
+    graph_path = os.path.join(structure_graphs_folder, graph_file)
+    if not os.path.isfile(graph_path):
+        print("Downloading structure graph " + graph_file)
+        urllib.request.urlretrieve(STRUCTURE_GRAPH_URL + graph_file, graph_path)
+    return {item["id"]: item for item in read_structure_graph(graph_path, encoded=True)}
+
+
+def format_mapping(mapping):
+    return " | ".join(sorted(relation + " " + to_iri(target) for relation, target in mapping)) if mapping else ""
+
+
+def compare_atlas(atlas, bridges_folder, templates_folder, structure_graphs_folder):
+    """
+    Compares the legacy bridge and the new template mappings of the given atlas.
+
+    Params:
+        atlas: atlas name such as 'mba'
+        bridges_folder: folder of the uberon-bridge-to-*.obo files
+        templates_folder: folder of the *_CCF_to_UBERON.tsv templates
+        structure_graphs_folder: folder of the structure graph json files
+    Returns: list of report rows
+    """
+    bridge_path = os.path.join(bridges_folder, BRIDGE_FILE.format(atlas))
+    template_path = os.path.join(templates_folder, TEMPLATE_FILE.format(atlas))
+    legacy = get_bridge_mappings(bridge_path) if os.path.isfile(bridge_path) else dict()
+    template = get_template_mappings(template_path) if os.path.isfile(template_path) else dict()
+    structure_graph = get_structure_graph(atlas, structure_graphs_folder)
+
+    term_ids = set(legacy).union(template)
+    if structure_graph:
+        term_ids.update(structure_graph)
+
+    report = list()
+    for term_id in sorted(term_ids, key=to_iri):
+        legacy_mapping = legacy.get(term_id)
+        template_mapping = template.get(term_id)
+        if legacy_mapping and template_mapping:
+            status = BOTH
+        elif legacy_mapping:
+            status = LEGACY_ONLY
+        elif template_mapping:
+            status = TEMPLATE_ONLY
+        else:
+            status = NEITHER
+        report.append({"atlas": atlas,
+                       "id": to_iri(term_id),
+                       "label": structure_graph[term_id]["name"] if structure_graph and term_id in structure_graph
+                       else "",
+                       "in_structure_graph": "" if structure_graph is None else str(term_id in structure_graph),
+                       "legacy_mapping": format_mapping(legacy_mapping),
+                       "template_mapping": format_mapping(template_mapping),
+                       "status": status,
+                       "agree": str(legacy_mapping == template_mapping) if status == BOTH else ""})
+    return report
+
+
+def generate_coverage_report(atlases, output_path, bridges_folder=BRIDGES_FOLDER, templates_folder=TEMPLATES_FOLDER,
+                             structure_graphs_folder=STRUCTURE_GRAPHS_FOLDER):
+    """
+    Generates the bridge coverage report of the given atlases and prints a per atlas summary to the console.
+
+    Params:
+        atlases: atlas names such as 'mba'
+        output_path: path of the output TSV report
+        bridges_folder: folder of the uberon-bridge-to-*.obo files
+        templates_folder: folder of the *_CCF_to_UBERON.tsv templates
+        structure_graphs_folder: folder of the structure graph json files
+    """
+    report = list()
+    for atlas in atlases:
+        atlas_report = compare_atlas(atlas, bridges_folder, templates_folder, structure_graphs_folder)
+        report.extend(atlas_report)
+        statuses = [row["status"] for row in atlas_report]
+        print("=== {} : {} structures, {} both, {} legacy only, {} template only, {} neither, {} disagree"
+              .format(atlas.upper(), len(atlas_report), statuses.count(BOTH), statuses.count(LEGACY_ONLY),
+                      statuses.count(TEMPLATE_ONLY), statuses.count(NEITHER),
+                      len([row for row in atlas_report if row["agree"] == "False"])))
+
+    columns = ["atlas", "id", "label", "in_structure_graph", "legacy_mapping", "template_mapping", "status", "agree"]
+    pd.DataFrame.from_records(report, columns=columns).to_csv(output_path, sep="\t", index=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compares legacy OBO bridges with the new mapping templates.')
+    parser.add_argument('-a', '--atlas', action='append', choices=ATLASES,
+                        help="Atlas to report, can be repeated. Default is all atlases.")
+    parser.add_argument('-b', '--bridges', default=BRIDGES_FOLDER,
+                        help="Folder of the uberon-bridge-to-*.obo files. Default is src/ontology/sources")
+    parser.add_argument('-t', '--templates', default=TEMPLATES_FOLDER, help="Folder of the mapping templates")
+    parser.add_argument('-s', '--structure_graphs', default=STRUCTURE_GRAPHS_FOLDER,
+                        help="Folder of the structure graph json files")
+    parser.add_argument('-o', '--output', default=REPORT_PATH, help="Path to output TSV file")
+    args = parser.parse_args()
+
+    generate_coverage_report(args.atlas or ATLASES, args.output, args.bridges, args.templates, args.structure_graphs)
@@ -0,0 +1,239 @@
+"""
+Columnar release artifacts. Writes the release tables as Parquet and (uncompressed, memory mappable) Arrow IPC files so
+that downstream consumers can filter mappings by atlas or term without parsing OWL:
+
+- mappings: atlas term to UBERON mappings (from report.tsv)
+- structures: per atlas structure hierarchy (from the structure graph json files)
+- ancestors: UBERON ancestor closure over is_a and part_of of every term (from tmp.json)
+- linkouts: Allen Brain Atlas links and preferred labels (from linkouts.tsv)
+
+IRI columns are dictionary encoded. The atlas column holds the atlas namespace (such as MBA) of the atlas terms and is
+null for the other terms (such as UBERON or GO terms).
+"""
+
+import os
+import json
+import argparse
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+
+from relation_validator import read_csv_to_dict
+from structure_graph_utils import read_structure_graph, NAMESPACES, ATLASES
+from id_codec import CODEC, encode, to_iri
+
+
+UBERON = "UBERON"
+ATLAS_NAMESPACES = set(atlas.upper() for atlas in ATLASES)
+PART_OF = encode("http://purl.obolibrary.org/obo/BFO_0000050")
+IS_A = "is_a"
+
+
+def get_atlas(term_id):
+    """
+    Gets the atlas namespace of the given encoded id such as MBA for http://purl.obolibrary.org/obo/MBA_1.
+
+    Params:
+        term_id: encoded term id (see id_codec)
+    Returns: atlas namespace of the term, None if the term is not an atlas term (such as UBERON terms)
+    """
+    namespace = CODEC.namespace(term_id)
+    return namespace if namespace in ATLAS_NAMESPACES else None
+
+
+def clean_label(value):
+    return str(value).strip().strip('"')
+
+
+def to_table(records, columns, iri_columns):
+    """
+    Converts records to an arrow table, dictionary encoding the given IRI columns.
+
+    Params:
+        records: list of dict rows
+        columns: table columns
+        iri_columns: columns to dictionary encode
+    Returns: arrow table
+    """
+    arrays = list()
+    for column in columns:
+        array = pa.array([record.get(column) for record in records], type=pa.string())
+        if column in iri_columns or column == "atlas":
+            array = array.dictionary_encode()
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, names=columns)
+
+
+def get_mappings_table(report_path):
+    """
+    Reads the mapping report generated by aba_mapping_report.sparql.
+
+    Params:
+        report_path: path of report.tsv
+    Returns: arrow table
+    """
+    headers, records = read_csv_to_dict(report_path, delimiter="\t", generated_ids=True)
+    mappings = list()
+    for row_num in records:
+        term_id = encode(records[row_num]["?sub"])
+        mappings.append({"atlas": get_atlas(term_id),
+                         "term": to_iri(term_id),
+                         "term_label": clean_label(records[row_num]["?subname"]),
+                         "uberon": to_iri(encode(records[row_num]["?sup"])),
+                         "uberon_label": clean_label(records[row_num]["?supname"])})
+    return to_table(mappings, ["atlas", "term", "term_label", "uberon", "uberon_label"], ["term", "uberon"])
+
+
+def get_structures_table(structure_graphs_folder):
+    """
+    Reads all available structure graphs.
+
+    Params:
+        structure_graphs_folder: folder of the structure graph json files
+    Returns: arrow table
+    """
+    structures = list()
+    for graph_file in NAMESPACES:
+        graph_path = os.path.join(structure_graphs_folder, graph_file)
+        if not os.path.isfile(graph_path):
+            print("Structure graph not found: " + graph_path)
+            continue
+        for structure in read_structure_graph(graph_path, encoded=True):
+            parent_id = structure.get("parent_structure_id")
+            structures.append({"atlas": get_atlas(structure["id"]),
+                               "id": to_iri(structure["id"]),
+                               "name": structure["name"],
+                               "acronym": structure["acronym"],
+                               "parent": to_iri(parent_id) if parent_id is not None else None})
+    return to_table(structures, ["atlas", "id", "name", "acronym", "parent"], ["id", "parent"])
+
+
+def get_ancestors_table(graph_json):
+    """
+    Computes the UBERON ancestors of all classes over is_a and part_of edges of the given obographs json.
+
+    Params:
+        graph_json: path of the obographs json (tmp.json)
+    Returns: arrow table
+    """
+    with open(graph_json, "r") as f:
+        graph = json.load(f)["graphs"][0]
+    parents = dict()
+    for edge in graph.get("edges", []):
+        if edge["pred"] == IS_A or encode(edge["pred"]) == PART_OF:
+            parents.setdefault(encode(edge["sub"]), set()).add(encode(edge["obj"]))
+
+    closure = get_ancestor_closure(parents)
+    ancestors = list()
+    for term in sorted(parents):
+        term_iri = to_iri(term)
+        for ancestor in sorted(closure[term]):
+            if CODEC.namespace(ancestor) == UBERON and ancestor != term:
+                ancestors.append({"atlas": get_atlas(term), "term": term_iri, "ancestor": to_iri(ancestor)})
+    return to_table(ancestors, ["atlas", "term", "ancestor"], ["term", "ancestor"])
+
+
+def get_linkouts_table(linkouts_path):
+    """
+    Reads the linkouts ROBOT template.
+
+    Params:
+        linkouts_path: path of linkouts.tsv
+    Returns: arrow table
+    """
+    headers, records = read_csv_to_dict(linkouts_path, delimiter="\t", generated_ids=True)
+    linkouts = list()
+    for row_num in records:
+        term = str(records[row_num]["ID"]).strip()
+        if term and term != "ID":
+            term_id = encode(term)
+            linkouts.append({"atlas": get_atlas(term_id),
+                             "id": to_iri(term_id),
+                             "xref": records[row_num]["xref"] or None,
+                             "pref_label": records[row_num]["prefLabel"]})
+    return to_table(linkouts, ["atlas", "id", "xref", "pref_label"], ["id"])
+
+
+def get_ancestor_closure(parents):
+    """
+    Computes the ancestors of all terms. Ancestor sets are memoized in post-order, so the shared upper levels of the
+    hierarchy are traversed once. Terms whose ancestor set depends on a cycle are completed afterwards with a traversal
+    that reuses the memoized sets.
+
+    Params:
+        parents: dict of term to set of its direct parents
+    Returns: dict of term to set of its ancestors
+    """
+    closure = dict()
+    incomplete = set()
+    for term in parents:
+        if term in closure:
+            continue
+        stack = [(term, iter(parents[term]))]
+        on_stack = {term}
+        while stack:
+            node, node_parents = stack[-1]
+            parent = next(node_parents, None)
+            if parent is None:
+                stack.pop()
+                on_stack.discard(node)
+                ancestors = set()
+                for parent in parents.get(node, ()):
+                    ancestors.add(parent)
+                    ancestors.update(closure.get(parent, ()))
+                    if parent in on_stack or parent in incomplete:
+                        incomplete.add(node)
+                closure[node] = ancestors
+            elif parent not in closure and parent not in on_stack:
+                on_stack.add(parent)
+                stack.append((parent, iter(parents.get(parent, ()))))
+
+    for term in incomplete:
+        ancestors = set()
+        stack = list(parents.get(term, ()))
+        while stack:
+            parent = stack.pop()
+            if parent not in ancestors:
+                ancestors.add(parent)
+                if parent in incomplete:
+                    stack.extend(parents.get(parent, ()))
+                else:
+                    ancestors.update(closure.get(parent, ()))
+        closure[term] = ancestors
+    return closure
+
+
+def write_table(table, name, output_folder):
+    pq.write_table(table, os.path.join(output_folder, name + ".parquet"))
+    feather.write_feather(table, os.path.join(output_folder, name + ".arrow"), compression="uncompressed")
+    print("{}: {} rows".format(name, table.num_rows))
+
+
+def generate_columnar_release(report_path, linkouts_path, graph_json, structure_graphs_folder, output_folder):
+    """
+    Writes all columnar release tables to the output folder.
+
+    Params:
+        report_path: path of report.tsv
+        linkouts_path: path of linkouts.tsv
+        graph_json: path of the obographs json (tmp.json)
+        structure_graphs_folder: folder of the structure graph json files
+        output_folder: folder of the Parquet and Arrow files
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    write_table(get_mappings_table(report_path), "mappings", output_folder)
+    write_table(get_structures_table(structure_graphs_folder), "structures", output_folder)
+    write_table(get_ancestors_table(graph_json), "ancestors", output_folder)
+    write_table(get_linkouts_table(linkouts_path), "linkouts", output_folder)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generates Parquet/Arrow release tables from the pipeline outputs.')
+    parser.add_argument('-r', '--report', help="Path to mapping report TSV file (report.tsv)")
+    parser.add_argument('-l', '--linkouts', help="Path to linkouts TSV file")
+    parser.add_argument('-g', '--graph', help="Path to obographs json of the merged ontology (tmp.json)")
+    parser.add_argument('-s', '--structure_graphs', help="Folder of the structure graph json files")
+    parser.add_argument('-o', '--output', help="Output folder")
+    args = parser.parse_args()
+
+    generate_columnar_release(args.report, args.linkouts, args.graph, args.structure_graphs, args.output)
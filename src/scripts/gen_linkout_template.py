@@ -3,6 +3,7 @@ from ruamel.yaml import YAML
 from string import Template
 import pandas as pd
 import argparse
+from id_codec import local_id
 
 parser = argparse.ArgumentParser(description='Process some integers.')
 parser.add_argument('filepath',
@@ -33,7 +34,7 @@ for n in g['nodes']:
                     try:
                         tab.append({'ID': n['id'],
                                     'xref': link.substitute(atlas_id=a['id'],
-                                                            structure_id=str(n['id']).rsplit('_', 1)[-1]),
+                                                            structure_id=local_id(n['id'])),
                                     'prefLabel': ' '.join([n['lbl'],
                                                            ' (',
                                                            v['species'],
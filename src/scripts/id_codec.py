@@ -0,0 +1,206 @@
+"""
+Compact identifier codec. Encodes atlas and UBERON IRIs/CURIEs (such as http://purl.obolibrary.org/obo/MBA_123,
+<http://purl.obolibrary.org/obo/MBA_123> or MBA:123) to a single packed integer of (namespace code, local id) so that
+internal dicts and sets hash and compare integers instead of long IRI strings. Identifiers are expanded back to IRIs
+or CURIEs only at output.
+
+Zero padded local ids (such as UBERON_0002616) get a namespace code per padding width. Non-numeric local ids (such as
+ABA:Brain or MBA_ENTITY) and non OBO IRIs are interned and flagged in the local id.
+
+Strings are parsed as CURIEs only if the prefix is a known namespace or the CURIE is OBO style (such as GO:0005575),
+other identifiers (such as urn:isbn:123) are interned as opaque identifiers.
+"""
+
+import re
+
+OBO_PURL = "http://purl.obolibrary.org/obo/"
+
+LOCAL_BITS = 40
+LOCAL_MASK = (1 << LOCAL_BITS) - 1
+# local ids with this bit set are indexes of the interned (non-numeric) local names
+INTERNED_FLAG = 1 << (LOCAL_BITS - 1)
+MAX_NUMERIC_ID = INTERNED_FLAG - 1
+# namespace code of the identifiers that are not OBO PURLs/CURIEs, local id is the index of the interned identifier
+OPAQUE_NAMESPACE = ""
+OBO_CURIE_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9_]*:[0-9]+")
+LOCAL_ID_PATTERN = re.compile(r"[^\s:/#]+")
+
+DEFAULT_NAMESPACES = [(OPAQUE_NAMESPACE, 0), ("UBERON", 7), ("MBA", 0), ("DMBA", 0), ("HBA", 0), ("DHBA", 0),
+                      ("PBA", 0), ("ABA", 0), ("NCBITaxon", 0), ("BFO", 7)]
+
+
+class IdCodec(object):
+    """
+    Interns namespaces and non-numeric local ids and packs identifiers to integers.
+    """
+
+    def __init__(self, namespaces=DEFAULT_NAMESPACES):
+        self.namespaces = list()
+        self.namespace_codes = dict()
+        # CURIEs of these namespaces can have non-numeric local ids. Fixed at construction, so that an identifier
+        # encodes the same way regardless of the namespaces interned later.
+        self.curie_namespaces = set(namespace for namespace, width in namespaces if namespace != OPAQUE_NAMESPACE)
+        self.local_names = list()
+        self.local_name_codes = dict()
+        for namespace, width in namespaces:
+            self.namespace_code(namespace, width)
+
+    def namespace_code(self, namespace, width=0, intern=True):
+        """
+        Interns the namespace.
+
+        Params:
+            namespace: namespace name such as MBA
+            width: zero padding width of the numeric local ids, 0 if not padded
+            intern: if 'False', unknown namespaces are not interned
+        Returns: namespace code, None if the namespace is unknown and not interned
+        """
+        key = (namespace, width)
+        code = self.namespace_codes.get(key)
+        if code is None and intern:
+            code = len(self.namespaces)
+            self.namespaces.append(key)
+            self.namespace_codes[key] = code
+        return code
+
+    def _intern_local(self, local_name, intern=True):
+        code = self.local_name_codes.get(local_name)
+        if code is None:
+            if not intern:
+                return None
+            code = len(self.local_names)
+            self.local_names.append(local_name)
+            self.local_name_codes[local_name] = code
+        return INTERNED_FLAG | code
+
+    def encode(self, identifier, intern=True):
+        """
+        Encodes an IRI or CURIE to its packed integer.
+
+        Params:
+            identifier: IRI (optionally in <>) or OBO CURIE
+            intern: if 'False', identifiers with unknown namespaces or local names are not interned
+        Returns: packed integer identifier, None if the identifier is unknown and not interned
+        """
+        identifier = str(identifier).strip()
+        if identifier.startswith("<") and identifier.endswith(">"):
+            identifier = identifier[1:-1]
+
+        if identifier.startswith(OBO_PURL):
+            namespace, sep, local_id = identifier[len(OBO_PURL):].rpartition("_")
+        elif self.is_curie(identifier):
+            namespace, sep, local_id = identifier.partition(":")
+        else:
+            sep = ""
+        if not sep or not namespace:
+            return self._intern_local(identifier, intern)
+
+        if local_id.isascii() and local_id.isdigit() and len(local_id) < 13 and int(local_id) <= MAX_NUMERIC_ID:
+            code = self.namespace_code(namespace, len(local_id) if local_id[0] == "0" else 0, intern)
+            local_code = int(local_id)
+        else:
+            code = self.namespace_code(namespace, intern=intern)
+            local_code = self._intern_local(local_id, intern)
+        if code is None or local_code is None:
+            return None
+        return (code << LOCAL_BITS) | local_code
+
+    def pack(self, namespace, local_id):
+        """
+        Packs a namespace and a (not padded) numeric local id without parsing an identifier string.
+
+        Params:
+            namespace: namespace name such as MBA
+            local_id: numeric local id
+        Returns: packed integer identifier
+        """
+        local_id = int(local_id)
+        if not 0 <= local_id <= MAX_NUMERIC_ID:
+            return self.encode(namespace + ":" + str(local_id))
+        return (self.namespace_code(namespace) << LOCAL_BITS) | local_id
+
+    def is_curie(self, identifier):
+        """
+        Returns: 'True' if the identifier is a CURIE of a known namespace or an OBO style CURIE
+        """
+        namespace, sep, local_id = identifier.partition(":")
+        if not sep:
+            return False
+        if namespace in self.curie_namespaces:
+            return LOCAL_ID_PATTERN.fullmatch(local_id) is not None
+        return OBO_CURIE_PATTERN.fullmatch(identifier) is not None
+
+    def local(self, packed_id):
+        """
+        Returns: local id (int for the numeric ones, string otherwise) of the packed identifier
+        """
+        local_id = packed_id & LOCAL_MASK
+        if local_id & INTERNED_FLAG:
+            return self.local_names[local_id ^ INTERNED_FLAG]
+        return local_id
+
+    def namespace(self, packed_id):
+        """
+        Returns: namespace (such as MBA) of the packed identifier
+        """
+        return self.namespaces[packed_id >> LOCAL_BITS][0]
+
+    def local_str(self, packed_id):
+        """
+        Returns: local id of the packed identifier as string, zero padded as in the encoded identifier
+        """
+        width = self.namespaces[packed_id >> LOCAL_BITS][1]
+        local_id = self.local(packed_id)
+        if width and isinstance(local_id, int):
+            return str(local_id).zfill(width)
+        return str(local_id)
+
+    def to_iri(self, packed_id):
+        """
+        Expands the packed identifier to its IRI.
+        """
+        namespace = self.namespace(packed_id)
+        if namespace == OPAQUE_NAMESPACE:
+            return str(self.local(packed_id))
+        return OBO_PURL + namespace + "_" + self.local_str(packed_id)
+
+    def to_curie(self, packed_id):
+        """
+        Expands the packed identifier to its CURIE.
+        """
+        namespace = self.namespace(packed_id)
+        if namespace == OPAQUE_NAMESPACE:
+            return str(self.local(packed_id))
+        return namespace + ":" + self.local_str(packed_id)
+
+
+CODEC = IdCodec()
+
+
+def encode(identifier):
+    return CODEC.encode(identifier)
+
+
+def lookup(identifier):
+    """
+    Encodes the identifier without interning new namespaces or local names.
+
+    Returns: packed integer identifier, None if the identifier is not known by the codec
+    """
+    return CODEC.encode(identifier, intern=False)
+
+
+def to_iri(packed_id):
+    return CODEC.to_iri(packed_id)
+
+
+def to_curie(packed_id):
+    return CODEC.to_curie(packed_id)
+
+
+def local_id(identifier):
+    """
+    Gets the local id of an IRI or CURIE as string, such as '123' for http://purl.obolibrary.org/obo/MBA_123 or
+    '0002616' for UBERON:0002616.
+    """
+    return CODEC.local_str(CODEC.encode(identifier))
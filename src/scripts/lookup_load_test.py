@@ -0,0 +1,131 @@
+"""
+Local load test of the lookup service (lookup_service.py). Starts the service in process on the given index (or
+targets a running instance with --port), sends a mix of term, label, ancestor/descendant, UBERON and cross-species
+requests from concurrent keep-alive connections and reports p50/p99 latency and throughput.
+
+    python lookup_load_test.py -i lookup_index.json -n 20000 -c 50
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+from urllib.parse import quote
+
+from lookup_service import LookupIndex, LookupService, INDEX_PATH, CACHE_SIZE
+from id_codec import to_curie
+
+
+def generate_targets(index, request_count, seed=0):
+    """
+    Generates random request targets over the indexed terms.
+
+    Params:
+        index: lookup index
+        request_count: number of targets
+        seed: random seed
+    Returns: list of request targets
+    """
+    rnd = random.Random(seed)
+    atlas_terms = sorted(term_id for term_id, term in index.terms.items() if term["mappings"])
+    structures = sorted(term_id for term_id, term in index.terms.items() if "parent" in term)
+    uberon_terms = sorted(index.uberon_terms)
+    labels = sorted(index.labels)
+    targets = list()
+    for i in range(request_count):
+        endpoint = rnd.choice(["term", "label", "ancestors", "descendants", "uberon", "cross_species"])
+        if endpoint == "label":
+            targets.append("/label?q=" + quote(rnd.choice(labels)))
+        elif endpoint in ("ancestors", "descendants") and structures:
+            targets.append("/{}/{}".format(endpoint, to_curie(rnd.choice(structures))))
+        elif endpoint == "uberon":
+            targets.append("/uberon/" + to_curie(rnd.choice(uberon_terms)))
+        else:
+            targets.append("/{}/{}".format(endpoint, to_curie(rnd.choice(atlas_terms))))
+    return targets
+
+
+async def run_client(host, port, targets, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for target in targets:
+            start = time.perf_counter()
+            writer.write("GET {} HTTP/1.1\r\nHost: {}\r\n\r\n".format(target, host).encode("latin-1"))
+            await writer.drain()
+            status_line = await reader.readline()
+            content_length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, sep, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    content_length = int(value)
+            await reader.readexactly(content_length)
+            latencies.append(time.perf_counter() - start)
+            if status_line.split()[1] != b"200":
+                errors.append(target)
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))]
+
+
+async def load_test(index_path, host, port, request_count, concurrency, cache_size):
+    """
+    Runs the load test and prints the latency and throughput report.
+
+    Params:
+        index_path: path of the lookup index json
+        host: service host
+        port: service port, if 0 the service is started in process on a free port
+        request_count: total number of requests
+        concurrency: number of concurrent connections
+        cache_size: response cache size of the in process service
+    Returns: report dict
+    """
+    index = LookupIndex(index_path)
+    server = None
+    if not port:
+        server = await LookupService(index, cache_size).start(host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    targets = generate_targets(index, request_count)
+    latencies = list()
+    errors = list()
+    start = time.perf_counter()
+    await asyncio.gather(*[run_client(host, port, targets[i::concurrency], latencies, errors)
+                           for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    if server:
+        server.close()
+        await server.wait_closed()
+
+    latencies.sort()
+    report = {"requests": len(latencies),
+              "concurrency": concurrency,
+              "errors": len(errors),
+              "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+              "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+              "throughput_rps": round(len(latencies) / elapsed, 1)}
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Load test of the lookup service.')
+    parser.add_argument('-i', '--index', default=INDEX_PATH, help="Path to index json")
+    parser.add_argument('--host', default="127.0.0.1", help="Service host")
+    parser.add_argument('-p', '--port', type=int, default=0,
+                        help="Port of a running service. Default starts the service in process.")
+    parser.add_argument('-n', '--requests', type=int, default=10000, help="Total number of requests")
+    parser.add_argument('-c', '--concurrency', type=int, default=20, help="Number of concurrent connections")
+    parser.add_argument('--cache_size', type=int, default=CACHE_SIZE, help="Response LRU cache size")
+    args = parser.parse_args()
+
+    asyncio.run(load_test(args.index, args.host, args.port, args.requests, args.concurrency, args.cache_size))
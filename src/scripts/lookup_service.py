@@ -0,0 +1,316 @@
+"""
+Read-only atlas/UBERON lookup service. Answers atlas to UBERON, UBERON to atlas, label, ancestor/descendant and
+cross-species queries from a precomputed index, without loading aba_uberon.owl or going through OLS.
+
+The index is built from the mapping templates (src/robot_templates/*_CCF_to_UBERON.tsv, atlases without a template
+fall back to their uberon bridge), the structure graphs (src/ontology/sources/N.json) and the linkouts template:
+
+    python lookup_service.py build -o lookup_index.json
+    python lookup_service.py serve -i lookup_index.json -p 8000
+
+Endpoints (ids are IRIs or CURIEs such as MBA:1 or UBERON:0002145):
+
+    /term/{id}            term label, atlas, parent, UBERON mappings and linkouts
+    /label?q={label}      terms with the given label or preferred label (case insensitive)
+    /ancestors/{id}       structure graph ancestors of an atlas term
+    /descendants/{id}     structure graph descendants of an atlas term
+    /uberon/{id}          atlas terms mapped to the UBERON term, grouped by atlas
+    /cross_species/{id}   terms of the other atlases mapped to the same UBERON terms as the atlas term
+"""
+
+import os
+import json
+import asyncio
+import argparse
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qs, unquote
+
+from relation_validator import read_csv_to_dict
+from structure_graph_utils import read_structure_graph, NAMESPACES, ATLASES
+from bridge_coverage_report import get_template_mappings, get_bridge_mappings, BRIDGE_FILE, TEMPLATE_FILE, \
+    BRIDGES_FOLDER, TEMPLATES_FOLDER, STRUCTURE_GRAPHS_FOLDER
+from id_codec import CODEC, encode, lookup, to_iri, to_curie
+
+
+LINKOUTS_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../robot_templates/linkouts.tsv")
+INDEX_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../ontology/lookup_index.json")
+CACHE_SIZE = 10000
+DEFAULT_PORT = 8000
+
+HTTP_STATUS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+def build_index(output_path, templates_folder=TEMPLATES_FOLDER, bridges_folder=BRIDGES_FOLDER,
+                structure_graphs_folder=STRUCTURE_GRAPHS_FOLDER, linkouts_path=LINKOUTS_PATH):
+    """
+    Builds the lookup index and writes it as json.
+
+    Params:
+        output_path: path of the index json
+        templates_folder: folder of the *_CCF_to_UBERON.tsv templates
+        bridges_folder: folder of the uberon-bridge-to-*.obo files
+        structure_graphs_folder: folder of the structure graph json files
+        linkouts_path: path of the linkouts template
+    """
+    terms = dict()
+
+    def get_term(term_id):
+        return terms.setdefault(term_id, {"atlas": CODEC.namespace(term_id)})
+
+    for graph_file in NAMESPACES:
+        graph_path = os.path.join(structure_graphs_folder, graph_file)
+        if not os.path.isfile(graph_path):
+            print("Structure graph not found: " + graph_path)
+            continue
+        for structure in read_structure_graph(graph_path, encoded=True):
+            term = get_term(structure["id"])
+            term["label"] = structure["name"]
+            term["acronym"] = structure["acronym"]
+            if structure.get("parent_structure_id"):
+                term["parent"] = to_iri(structure["parent_structure_id"])
+
+    for atlas in ATLASES:
+        template_path = os.path.join(templates_folder, TEMPLATE_FILE.format(atlas))
+        bridge_path = os.path.join(bridges_folder, BRIDGE_FILE.format(atlas))
+        if os.path.isfile(template_path):
+            mappings = get_template_mappings(template_path)
+        elif os.path.isfile(bridge_path):
+            mappings = get_bridge_mappings(bridge_path)
+        else:
+            continue
+        for term_id, mapping in mappings.items():
+            get_term(term_id)["mappings"] = sorted([relation, to_iri(uberon)] for relation, uberon in mapping)
+
+    headers, records = read_csv_to_dict(linkouts_path, delimiter="\t", generated_ids=True)
+    for row_num in records:
+        term_id = str(records[row_num]["ID"]).strip()
+        if not term_id or term_id == "ID":
+            continue
+        term = get_term(encode(term_id))
+        term["pref_label"] = records[row_num]["prefLabel"]
+        if records[row_num]["xref"]:
+            term.setdefault("linkouts", []).append(records[row_num]["xref"])
+
+    with open(output_path, "w") as f:
+        json.dump({to_iri(term_id): term for term_id, term in terms.items()}, f)
+    print("Index of {} terms written to {}".format(len(terms), output_path))
+
+
+class LookupIndex(object):
+    """
+    In memory lookup index. Terms are keyed by their encoded ids (see id_codec).
+    """
+
+    def __init__(self, index_path):
+        with open(index_path, "r") as f:
+            index = json.load(f)
+        self.terms = dict()
+        self.children = dict()
+        self.uberon_terms = dict()
+        self.labels = dict()
+        for iri, term in index.items():
+            term_id = encode(iri)
+            if "parent" in term:
+                term["parent"] = encode(term["parent"])
+                self.children.setdefault(term["parent"], []).append(term_id)
+            term["mappings"] = [(relation, encode(uberon)) for relation, uberon in term.get("mappings", [])]
+            for relation, uberon in term["mappings"]:
+                self.uberon_terms.setdefault(uberon, set()).add(term_id)
+            for label in {term.get("label"), term.get("pref_label")}:
+                if label:
+                    self.labels.setdefault(label.strip().lower(), set()).add(term_id)
+            self.terms[term_id] = term
+
+    def __len__(self):
+        return len(self.terms)
+
+    def label(self, term_id):
+        term = self.terms.get(term_id, dict())
+        return term.get("label") or term.get("pref_label", "")
+
+    def summary(self, term_id):
+        return {"id": to_iri(term_id), "curie": to_curie(term_id), "label": self.label(term_id)}
+
+    def term(self, term_id):
+        term = self.terms[term_id]
+        record = self.summary(term_id)
+        record["atlas"] = term["atlas"]
+        record["acronym"] = term.get("acronym")
+        record["pref_label"] = term.get("pref_label")
+        record["parent"] = self.summary(term["parent"]) if "parent" in term else None
+        record["mappings"] = [dict(self.summary(uberon), relation=relation) for relation, uberon in term["mappings"]]
+        record["linkouts"] = term.get("linkouts", [])
+        return record
+
+    def search_label(self, label):
+        return [self.summary(term_id) for term_id in sorted(self.labels.get(label.strip().lower(), ()), key=to_iri)]
+
+    def ancestors(self, term_id):
+        ancestors = list()
+        parent = self.terms[term_id].get("parent")
+        while parent is not None and parent not in ancestors:
+            ancestors.append(parent)
+            parent = self.terms.get(parent, dict()).get("parent")
+        return [self.summary(ancestor) for ancestor in ancestors]
+
+    def descendants(self, term_id):
+        descendants = list()
+        visited = {term_id}
+        stack = list(self.children.get(term_id, ()))
+        while stack:
+            child = stack.pop()
+            if child not in visited:
+                visited.add(child)
+                descendants.append(child)
+                stack.extend(self.children.get(child, ()))
+        return [self.summary(descendant) for descendant in sorted(descendants, key=to_iri)]
+
+    def uberon(self, uberon_id):
+        atlases = dict()
+        for term_id in sorted(self.uberon_terms.get(uberon_id, ()), key=to_iri):
+            relations = [relation for relation, uberon in self.terms[term_id]["mappings"] if uberon == uberon_id]
+            atlases.setdefault(self.terms[term_id]["atlas"], []).append(dict(self.summary(term_id),
+                                                                             relations=relations))
+        return dict(self.summary(uberon_id), atlases=atlases)
+
+    def cross_species(self, term_id):
+        term = self.terms[term_id]
+        mappings = list()
+        for relation, uberon in term["mappings"]:
+            atlases = self.uberon(uberon)["atlases"]
+            atlases.pop(term["atlas"], None)
+            mappings.append(dict(self.summary(uberon), relation=relation, atlases=atlases))
+        return dict(self.summary(term_id), mappings=mappings)
+
+
+class LookupService(object):
+    """
+    asyncio HTTP/1.1 server over the lookup index. Responses are kept in an LRU cache keyed by request target.
+    """
+
+    def __init__(self, index, cache_size=CACHE_SIZE):
+        self.index = index
+        self.routes = {"term": index.term,
+                       "ancestors": index.ancestors,
+                       "descendants": index.descendants,
+                       "uberon": index.uberon,
+                       "cross_species": index.cross_species}
+        self.respond = lru_cache(maxsize=cache_size)(self._respond)
+
+    def _respond(self, target):
+        """
+        Resolves the request target.
+
+        Params:
+            target: request target such as /term/MBA:1
+        Returns: (HTTP status, json body bytes)
+        """
+        url = urlsplit(target)
+        route, sep, identifier = url.path.lstrip("/").partition("/")
+        identifier = unquote(identifier)
+        if route == "label":
+            query = parse_qs(url.query).get("q")
+            if not query:
+                return 400, json.dumps({"error": "'q' parameter is required"}).encode("utf-8")
+            return 200, json.dumps(self.index.search_label(query[0])).encode("utf-8")
+        if route not in self.routes:
+            return 404, json.dumps({"error": "Unknown endpoint: " + url.path}).encode("utf-8")
+        if not identifier:
+            return 400, json.dumps({"error": "Term id is required"}).encode("utf-8")
+        # unknown request ids are not interned, so they can't grow the codec tables
+        term_id = lookup(identifier)
+        known_terms = self.index.uberon_terms if route == "uberon" else self.index.terms
+        if term_id is None or term_id not in known_terms:
+            return 404, json.dumps({"error": "Unknown term: " + identifier}).encode("utf-8")
+        return 200, json.dumps(self.routes[route](term_id)).encode("utf-8")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.write_response(writer, 400, b"{}", False)
+                    break
+                headers = dict()
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, sep, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+                keep_alive = version == "HTTP/1.1" and headers.get("connection") != "close"
+
+                # consume the request body to keep the connection framed, chunked bodies are not supported
+                if "transfer-encoding" in headers:
+                    keep_alive = False
+                elif headers.get("content-length", "0") != "0":
+                    if not (headers["content-length"].isascii() and headers["content-length"].isdigit()):
+                        await self.write_response(writer, 400, b"{}", False)
+                        break
+                    await reader.readexactly(int(headers["content-length"]))
+
+                if method != "GET":
+                    status, body = 405, json.dumps({"error": "Only GET is supported"}).encode("utf-8")
+                else:
+                    try:
+                        status, body = self.respond(target)
+                    except Exception as e:
+                        status, body = 500, json.dumps({"error": "{}: {}".format(type(e).__name__, e)}).encode("utf-8")
+                await self.write_response(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ValueError:
+            # readline() raises when the request line or a header exceeds the stream limit (64 KiB)
+            await self.write_response(writer, 431, json.dumps({"error": "Request line or header is too long"})
+                                      .encode("utf-8"), False)
+        except (ConnectionResetError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def write_response(writer, status, body, keep_alive):
+        writer.write("HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: {}\r\n\r\n"
+                     .format(status, HTTP_STATUS[status], len(body), "keep-alive" if keep_alive else "close")
+                     .encode("latin-1") + body)
+        await writer.drain()
+
+    async def start(self, host, port):
+        return await asyncio.start_server(self.handle, host, port)
+
+
+async def serve(index_path, host, port, cache_size):
+    index = LookupIndex(index_path)
+    server = await LookupService(index, cache_size).start(host, port)
+    print("Serving {} terms on http://{}:{}".format(len(index), host, port))
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Atlas/UBERON lookup service.')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Builds the lookup index")
+    build_parser.add_argument('-o', '--output', default=INDEX_PATH, help="Path to output index json")
+    build_parser.add_argument('-t', '--templates', default=TEMPLATES_FOLDER, help="Folder of the mapping templates")
+    build_parser.add_argument('-b', '--bridges', default=BRIDGES_FOLDER,
+                              help="Folder of the uberon-bridge-to-*.obo files")
+    build_parser.add_argument('-s', '--structure_graphs', default=STRUCTURE_GRAPHS_FOLDER,
+                              help="Folder of the structure graph json files")
+    build_parser.add_argument('-l', '--linkouts', default=LINKOUTS_PATH, help="Path to linkouts TSV file")
+    serve_parser = subparsers.add_parser("serve", help="Starts the lookup service")
+    serve_parser.add_argument('-i', '--index', default=INDEX_PATH, help="Path to index json")
+    serve_parser.add_argument('--host', default="127.0.0.1", help="Host to bind")
+    serve_parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help="Port to listen")
+    serve_parser.add_argument('-c', '--cache_size', type=int, default=CACHE_SIZE, help="Response LRU cache size")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        build_index(args.output, args.templates, args.bridges, args.structure_graphs, args.linkouts)
+    else:
+        asyncio.run(serve(args.index, args.host, args.port, args.cache_size))
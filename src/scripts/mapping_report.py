@@ -9,12 +9,17 @@ since json is already processed and ontology generated) but not in the new bridg
 (MBA_BRIDGE). Differences are printed to the console with their Uberon parents.
 
 Script uses FunOWL to read the ofn ontology format and this operation is pretty slow.
+
+Queries run on a pluggable triple store backend (see triple_store.py) selected with the --backend flag. rdflib is the
+default, oxigraph is an optional faster SPARQL engine. --check_backends runs the report queries on all available
+backends and reports any difference in their result sets.
 """
 
 import os
-from rdflib import Graph
-from funowl.converters.functional_converter import to_python
+import argparse
 from relation_validator import read_csv_to_dict
+from id_codec import encode, to_iri
+from triple_store import open_store, BACKENDS, DEFAULT_BACKEND, OXIGRAPH_BACKEND, RDFLIB_BACKEND, pyoxigraph
 
 
 SPARQL_PATH = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../sparql/bridge_mappings_terms.sparql")
@@ -32,72 +37,42 @@ def query_mapped_entities(graph, query):
         graph: ontology graph
         query: query to run
 
-    Returns: set of entity names
+    Returns: set of encoded entity ids (see id_codec)
     """
     qres = graph.query(query)
     mapped_entities = set()
     index = 1
     for row in qres:
-        print(str(index) + "- " + row.term)
-        mapped_entities.add(str(row.term).strip())
+        print(str(index) + "- " + row["term"])
+        mapped_entities.add(encode(row["term"]))
         index += 1
 
     return mapped_entities
 
 
-def read_ontology(ontology_path):
+def read_ontology(ontology_path, backend=DEFAULT_BACKEND):
     """
     Reads ontology file in any format from the given path.
 
     Params:
         ontology_path: file path to the ontology
+        backend: triple store backend to load the ontology into
     Return: ontology graph
     """
-    try:
-        graph = Graph()
-        print("reading ontology file...")
-        graph.parse(ontology_path)
-        print("ontology file read")
-    except:
-        graph = read_ofn_file(ontology_path)
-    return graph
-
-
-def read_ofn_file(ont_path):
-    """
-    Uses FunOWL to read ontology file in OWL functional syntax to rdflib graph.
-    This function works very slow, but does the job.
-    Params:
-        ont_path: path of the ontology file in ofn format.
-
-    Returns: rdflib graph object.
-    """
-    print("Converting functional syntax to rdf with FunOWL...")
-    ont_doc = to_python(ont_path)
-    graph = Graph()
-    ont_doc.to_rdf(graph)
-    print("RDF conversion completed!!!")
-
-    return graph
+    return open_store(ontology_path, backend)
 
 
-def get_new_mapped_terms(ontology_path):
+def get_new_mapped_terms(ontology_path, backend=DEFAULT_BACKEND):
     """
     Gets ABA terms from the new bridge ontology.
 
     Params:
         ontology_path: ontology file path
+        backend: triple store backend to run the query on
     Returns: list of mapped ABA terms
     """
-    try:
-        graph = Graph()
-        graph.parse(ontology_path)
-    except:
-        graph = read_ofn_file(ontology_path)
-    # read query from file
-    with open(SPARQL_PATH, "r") as f:
-        query = f.read()
-    mapped_entities = query_mapped_entities(graph, query)
+    graph = read_ontology(ontology_path, backend)
+    mapped_entities = query_mapped_entities(graph, read_query(SPARQL_PATH))
 
     return mapped_entities
 
@@ -111,21 +86,23 @@ def get_old_mapped_terms():
     headers, records = read_csv_to_dict(OLD_MAPPING_FILE, delimiter="\t", generated_ids=True)
     legacy_terms = set()
     for row_num in records:
-        legacy_terms.add(str(records[row_num]["subclass_iri"]).strip().lstrip("<").rstrip(">"))
+        legacy_terms.add(encode(records[row_num]["subclass_iri"]))
     return legacy_terms
 
 
-def get_ont_terms(ontology_path):
+def read_query(query_path):
     """
-    Gets ABA terms from the new bridge ontology.
+    Reads SPARQL query from the given file.
 
     Params:
-        ontology_path: ontology file path
-    Returns: list of mapped ABA terms
+        query_path: query file path
+    Returns: query string
     """
-    graph = read_ontology(ontology_path)
+    with open(query_path, "r") as f:
+        return f.read()
 
-    query = """
+
+ONT_TERMS_QUERY = """
     PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
     PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
     PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
@@ -138,7 +115,19 @@ def get_ont_terms(ontology_path):
       FILTER(strstarts(str(?class),str(MBA:)) )
     }
     """
-    mapped_entities = query_mapped_entities(graph, query)
+
+
+def get_ont_terms(ontology_path, backend=DEFAULT_BACKEND):
+    """
+    Gets ABA terms from the new bridge ontology.
+
+    Params:
+        ontology_path: ontology file path
+        backend: triple store backend to run the query on
+    Returns: list of mapped ABA terms
+    """
+    graph = read_ontology(ontology_path, backend)
+    mapped_entities = query_mapped_entities(graph, ONT_TERMS_QUERY)
 
     return mapped_entities
 
@@ -168,9 +157,9 @@ def query_label(graph, entity):
     qres = graph.query(query)
     labels = set()
     for row in qres:
-        labels.add(str(row.label).strip())
+        labels.add(str(row["label"]).strip())
 
-    return " & ".join(labels)
+    return " & ".join(sorted(labels))
 
 
 def query_parent(graph, entity):
@@ -213,10 +202,10 @@ def query_parent(graph, entity):
         parents = set()
         labels = set()
         for row in qres:
-            parents.add(str(row.term).strip())
-            labels.add(str(row.label).strip())
+            parents.add(str(row["term"]).strip())
+            labels.add(str(row["label"]).strip())
         if parents:
-            return " & ".join(parents) + " (" + " & ".join(labels) + ")"
+            return " & ".join(sorted(parents)) + " (" + " & ".join(sorted(labels)) + ")"
 
     return ""
 
@@ -250,31 +239,37 @@ def generate_path_query(i):
     return query_mid
 
 
-def report_old_vs_new_bridge():
+def report_old_vs_new_bridge(backend=DEFAULT_BACKEND):
     """
     Reports the ABA terms that are mapped in the legacy file (OLD_MAPPING_FILE) but not in the new bridge ontology
     (LATEST_BRIDGE). Differences are printed to the console.
+
+    Params:
+        backend: triple store backend to run the queries on
     """
-    new_terms = get_new_mapped_terms(LATEST_BRIDGE)
+    new_terms = get_new_mapped_terms(LATEST_BRIDGE, backend)
     old_terms = get_old_mapped_terms()
     terms_not_in_new = old_terms.difference(new_terms)
     print("=======================================================")
     print("Terms that exist in the old mapping but not in the new one:")
     counter = 1
-    for entity in terms_not_in_new:
+    for entity in sorted(to_iri(term) for term in terms_not_in_new):
         print(str(counter) + "- " + entity)
         counter += 1
 
 
-def report_json_vs_new_bridge():
+def report_json_vs_new_bridge(backend=DEFAULT_BACKEND):
     """
     Reports the ABA terms that are defined in the json
     (such as http://api.brain-map.org/api/v2/structure_graph_download/1.json, but we will use src/ontology/sources/1.ofn
     since json is already processed and ontology generated) but not in the new bridge ontology
     (MBA_BRIDGE). Differences are printed to the console with their Uberon parents.
+
+    Params:
+        backend: triple store backend to run the queries on
     """
-    new_terms = get_ont_terms(MBA_BRIDGE)
-    json_terms = get_ont_terms(JSON_ONT)
+    new_terms = get_ont_terms(MBA_BRIDGE, backend)
+    json_terms = get_ont_terms(JSON_ONT, backend)
     terms_not_in_new = json_terms.difference(new_terms)
     print("=======================================================")
     print("Bridge term count: " + str(len(new_terms)))
@@ -282,12 +277,106 @@ def report_json_vs_new_bridge():
     print("Terms that exist in the json but not in the mba bridge")
     counter = 1
 
-    g = read_ontology(UBERON_WITH_BRIDGE)
-    for entity in terms_not_in_new:
+    g = read_ontology(UBERON_WITH_BRIDGE, backend)
+    for entity in sorted(to_iri(term) for term in terms_not_in_new):
         print(str(counter) + "- " + entity + " (" + query_label(g, entity) + ")" + " - " + query_parent(g, entity))
         counter += 1
 
 
+def check_backends(bridge_path=MBA_BRIDGE, json_ontology_path=JSON_ONT, report_ontology_path=UBERON_WITH_BRIDGE):
+    """
+    Runs the report queries with all available triple store backends and reports result sets that differ from the
+    default (rdflib) backend. Term queries run on the bridge and json ontologies, label and parent queries run on the
+    report ontology for the terms that exist in the json but not in the bridge (as in report_json_vs_new_bridge).
+
+    Params:
+        bridge_path: path of the mba bridge ontology
+        json_ontology_path: path of the ontology generated from the structure graph json
+        report_ontology_path: path of the uberon ontology merged with the bridge
+    Returns: True if at least two backends are compared and all of them returned identical result sets. Label and parent
+    queries are skipped with a warning if the report ontology (built by robot) is not available.
+    """
+    backends = [backend for backend in BACKENDS if backend != OXIGRAPH_BACKEND or pyoxigraph is not None]
+    if len(backends) < 2:
+        print("Backend check requires at least two triple store backends but only '{}' is available. "
+              "Install pyoxigraph to compare with the '{}' backend.".format(", ".join(backends), OXIGRAPH_BACKEND))
+        return False
+
+    queries = {"ont_terms": ONT_TERMS_QUERY, "bridge_mappings_terms": read_query(SPARQL_PATH)}
+    all_same = True
+    ont_terms = dict()
+    for ontology_path in (bridge_path, json_ontology_path):
+        stores = {backend: read_ontology(ontology_path, backend) for backend in backends}
+        for query_name, query in queries.items():
+            results = {backend: query_results(stores[backend], query) for backend in backends}
+            all_same = compare_results(results, query_name, ontology_path) and all_same
+        ont_terms[ontology_path] = set(row["term"] for row in stores[RDFLIB_BACKEND].query(ONT_TERMS_QUERY))
+
+    if os.path.isfile(report_ontology_path):
+        entities = sorted(ont_terms[json_ontology_path] - ont_terms[bridge_path])
+        stores = {backend: read_ontology(report_ontology_path, backend) for backend in backends}
+        for query_name, query_function in (("label", query_label), ("parent", query_parent)):
+            results = {backend: set((entity, query_function(stores[backend], entity)) for entity in entities)
+                       for backend in backends}
+            all_same = compare_results(results, query_name, report_ontology_path) and all_same
+    else:
+        print("WARNING: Report ontology not found, label and parent queries are skipped: " + report_ontology_path)
+
+    print("=======================================================")
+    print("Backends compared: " + ", ".join(backends))
+    print("Result sets are " + ("identical." if all_same else "NOT identical."))
+    return all_same
+
+
+def compare_results(results, query_name, ontology_path):
+    """
+    Compares the result sets of all backends with the result set of the default (rdflib) backend. Differences are
+    printed to the console.
+
+    Params:
+        results: dict of backend name to result set
+        query_name: name of the query for reporting
+        ontology_path: path of the queried ontology for reporting
+    Returns: True if all result sets are identical
+    """
+    all_same = True
+    for backend in results:
+        if results[backend] != results[RDFLIB_BACKEND]:
+            all_same = False
+            print("{} query results of '{}' differ from {} on {}: {} missing, {} extra."
+                  .format(query_name, backend, RDFLIB_BACKEND, ontology_path,
+                          len(results[RDFLIB_BACKEND] - results[backend]),
+                          len(results[backend] - results[RDFLIB_BACKEND])))
+    return all_same
+
+
+def query_results(graph, query):
+    """
+    Runs given query in the given graph and returns the result set as comparable rows.
+
+    Params:
+        graph: ontology graph
+        query: query to run
+    Returns: set of result rows as sorted (variable, value) tuples
+    """
+    return set(tuple(sorted(row.items())) for row in graph.query(query))
+
+
 if __name__ == '__main__':
-    # report_old_vs_new_bridge()
-    report_json_vs_new_bridge()
+    parser = argparse.ArgumentParser(description='Mapping report generator.')
+    parser.add_argument('-r', '--report', choices=["json", "old"], default="json",
+                        help="'json': structure graph terms missing in the mba bridge (default), "
+                             "'old': legacy mappings missing in the new bridge.")
+    parser.add_argument('-b', '--backend', choices=list(BACKENDS), default=DEFAULT_BACKEND,
+                        help="Triple store backend to run the queries on. Default is " + DEFAULT_BACKEND)
+    parser.add_argument('--check_backends', action='store_true',
+                        help="Compares query result sets of all available backends instead of reporting.")
+    args = parser.parse_args()
+
+    if args.check_backends:
+        if not check_backends():
+            raise SystemExit(1)
+    elif args.report == "old":
+        report_old_vs_new_bridge(args.backend)
+    else:
+        report_json_vs_new_bridge(args.backend)
@@ -7,6 +7,7 @@ import urllib.request
 
 from relation_validator import read_csv_to_dict
 from structure_graph_utils import read_structure_graph
+from id_codec import encode
 from abc import ABC, abstractmethod, ABCMeta
 from os.path import isfile, join
 
@@ -130,7 +131,7 @@ class StructureGraphChecker(StrictChecker):
         web_file_name = SG_NAME_MAP[structure_graph_type]
         urllib.request.urlretrieve(STRUCTURE_GRAPH_URL + web_file_name, web_file_name)
 
-        structure_graph_list = read_structure_graph(web_file_name)
+        structure_graph_list = read_structure_graph(web_file_name, encoded=True)
         structure_graph = dict()
         for item in structure_graph_list:
             structure_graph[item["id"]] = item
@@ -139,18 +140,19 @@ class StructureGraphChecker(StrictChecker):
         for line_number in records:
             mapped_id = str(records[line_number]["ID"]).strip()
             if mapped_id and mapped_id != "ID" and not str(mapped_id).endswith(structure_graph_type + "_ENTITY"):
-                if mapped_id not in structure_graph:
+                if encode(mapped_id) not in structure_graph:
                     self.reports.append("{} not exists in the structure graph.".format(mapped_id))
 
         for line_number in records:
             mapped_id = records[line_number]["ID"]
-            if mapped_id in structure_graph:
-                if str(structure_graph[mapped_id]["name"]).lower().strip() != \
+            structure = structure_graph.get(encode(mapped_id))
+            if structure:
+                if str(structure["name"]).lower().strip() != \
                         str(records[line_number]["Label"]).lower().strip():
                     self.reports.append("{} label is '{}' in template, but '{}' in the structure graph.".
                                         format(mapped_id,
                                                records[line_number]["Label"],
-                                               structure_graph[mapped_id]["name"]))
+                                               structure["name"]))
 
     def get_header(self):
         return "=== Structure Graph Compatibility :"
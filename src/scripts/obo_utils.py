@@ -0,0 +1,98 @@
+"""
+Minimal OBO flat file reader. Reads [Term]/[Typedef] stanzas of the uberon bridge files without an OWL conversion.
+"""
+
+# relations that are written with their labels in some of the bridges
+PART_OF = "BFO:0000050"
+RELATION_ALIASES = {"part_of": PART_OF}
+
+
+def read_obo_stanzas(obo_path):
+    """
+    Reads stanzas of the given OBO file. Trailing '! comments' and '{qualifiers}' are removed from the tag values.
+
+    Params:
+        obo_path: path of the OBO file
+    Returns: list of (stanza type, tag values) tuples. Tag values is a dict of tag name to list of values. Header
+    stanza has type 'Header'.
+    """
+    stanzas = list()
+    stanza_type = "Header"
+    tags = dict()
+    with open(obo_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("[") and line.endswith("]"):
+                stanzas.append((stanza_type, tags))
+                stanza_type = line[1:-1]
+                tags = dict()
+                continue
+            tag, sep, value = line.partition(":")
+            if not sep:
+                continue
+            tags.setdefault(tag, []).append(strip_value(value))
+    stanzas.append((stanza_type, tags))
+    return stanzas
+
+
+def read_obo_terms(obo_path):
+    """
+    Reads [Term] stanzas of the given OBO file. Stanzas with the same id are merged (as in OBO semantics).
+
+    Params:
+        obo_path: path of the OBO file
+    Returns: dict of term id to tag values
+    """
+    terms = dict()
+    for stanza_type, tags in read_obo_stanzas(obo_path):
+        if stanza_type == "Term" and "id" in tags:
+            term = terms.setdefault(tags["id"][0], dict())
+            for tag, values in tags.items():
+                term_values = term.setdefault(tag, [])
+                term_values.extend(value for value in values if value not in term_values)
+    return terms
+
+
+def strip_value(value):
+    """
+    Removes '! comment' and '{qualifier}' suffixes of a tag value, ignoring the ones inside quoted strings.
+
+    Params:
+        value: raw tag value
+    Returns: cleaned tag value
+    """
+    value = value.strip()
+    if '"' not in value:
+        end = value.find("!")
+        if end != -1:
+            value = value[:end]
+        end = value.find("{")
+        if end != -1:
+            value = value[:end]
+        return value.strip()
+
+    in_quote = False
+    escaped = False
+    for index, char in enumerate(value):
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            in_quote = not in_quote
+        elif not in_quote and char in "!{":
+            return value[:index].strip()
+    return value
+
+
+def normalize_relation(relation):
+    """
+    Replaces relation labels (such as part_of) with their CURIEs (BFO:0000050).
+
+    Params:
+        relation: relation label or CURIE
+    Returns: relation CURIE
+    """
+    return RELATION_ALIASES.get(relation, relation)
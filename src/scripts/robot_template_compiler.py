@@ -0,0 +1,717 @@
+"""
+Native compiler of the ROBOT template subset used by the mapping and linkout templates. Streams the template rows to
+OWL axioms without launching robot (and the JVM) or loading an input ontology. The axioms of each row are written as
+they are compiled, in OWL functional syntax for .ofn paths and in RDF/XML (as robot writes the Makefile targets)
+otherwise.
+
+Supported template strings:
+
+- ID
+- A {annotation property}: annotation assertion with a literal value
+- >A {annotation property}: annotation of the axioms generated by the previous column
+- SC {class expression}: subclass axiom, % is replaced by the cell value
+- EC {class expression}: equivalent class axiom
+- C {class expression} with a CLASS_TYPE column: subclass axiom per column for 'subclass' rows, single equivalent
+  class axiom intersecting all C columns for 'equivalent' rows
+
+Class expressions are the Manchester syntax subset of 'and', 'or', 'not', 'some', 'only' and parentheses over IRIs,
+CURIEs and the labels in LABELS.
+
+Cells are read as robot reads them: whitespace is kept in ID and A cells (spaces of an ID are percent-encoded in the
+IRI) and trimmed from >A cells. Cells that are blank after trimming are skipped.
+
+    python robot_template_compiler.py -t ../robot_templates/mba_CCF_to_UBERON.tsv \
+        -t ../robot_templates/mba_CCF_to_UBERON_source.tsv -o new-bridges/new-uberon-bridge-to-mba.owl
+    python robot_template_compiler.py --all -d ../ontology
+
+--check compares the compiled ontology with the robot output (RDF/XML or OWL functional syntax) of the same templates
+at the RDF graph level, such as the committed new-bridges/new-uberon-bridge-to-mba.owl.
+"""
+
+import os
+import re
+import csv
+import argparse
+from itertools import count
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+from rdflib import Graph, URIRef, BNode, Literal, RDF, RDFS, OWL, XSD
+
+from obo_utils import PART_OF
+
+
+TEMPLATES_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../robot_templates")
+ONTOLOGY_FOLDER = os.path.join(os.path.dirname(os.path.realpath(__file__)), "../ontology")
+BRIDGE_TARGETS = ["mba", "dmba"]
+
+OBO_PURL = "http://purl.obolibrary.org/obo/"
+PREFIXES = {"rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+            "rdfs": "http://www.w3.org/2000/01/rdf-schema#",
+            "xsd": "http://www.w3.org/2001/XMLSchema#",
+            "owl": "http://www.w3.org/2002/07/owl#",
+            "skos": "http://www.w3.org/2004/02/skos/core#",
+            "oboInOwl": "http://www.geneontology.org/formats/oboInOwl#",
+            "OboInOwl": "http://www.geneontology.org/formats/oboInOwl#",
+            "dc": "http://purl.org/dc/elements/1.1/",
+            "dcterms": "http://purl.org/dc/terms/"}
+# labels of the entities used in the template expressions (robot resolves them from the input ontology)
+LABELS = {"part_of": OBO_PURL + PART_OF.replace(":", "_"),
+          "part of": OBO_PURL + PART_OF.replace(":", "_")}
+
+SUBCLASS = "subclass"
+EQUIVALENT = "equivalent"
+
+TOKEN_PATTERN = re.compile(r"\(|\)|'[^']*'|<[^>]*>|[^\s()]+")
+KEYWORDS = {"and", "or", "not", "some", "only"}
+
+OFN_TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|<[^>]*>|\^\^|@[A-Za-z0-9-]+|#[^\n]*|\(|\)|=|[^\s()=<"^@#]+')
+OFN_ESCAPE_PATTERN = re.compile(r'\\(["\\])')
+XSD_STRING = PREFIXES["xsd"] + "string"
+# entities of the built-in vocabularies (such as rdfs:label) are not declared
+BUILTIN_NAMESPACES = tuple(PREFIXES[prefix] for prefix in ["rdf", "rdfs", "xsd", "owl"])
+
+# namespaces declared by the RDF/XML root element, properties of other namespaces declare their own
+XML_NAMESPACES = {"rdf": PREFIXES["rdf"], "rdfs": PREFIXES["rdfs"], "xsd": PREFIXES["xsd"], "owl": PREFIXES["owl"],
+                  "obo": OBO_PURL, "oboInOwl": PREFIXES["oboInOwl"], "skos": PREFIXES["skos"],
+                  "dc": PREFIXES["dc"], "dcterms": PREFIXES["dcterms"]}
+XML_QNAME_PATTERN = re.compile(r"(.*[#/])([A-Za-z_][A-Za-z0-9_.-]*)")
+
+
+def iri_node(term):
+    return "IRI", str(term)
+
+
+# OWL 2 mapping to RDF graphs of the constructs the compiler generates
+RDF_DECLARATIONS = {"Class": iri_node(OWL.Class), "ObjectProperty": iri_node(OWL.ObjectProperty),
+                    "AnnotationProperty": iri_node(OWL.AnnotationProperty)}
+RDF_CLASS_AXIOMS = {"SubClassOf": iri_node(RDFS.subClassOf), "EquivalentClasses": iri_node(OWL.equivalentClass)}
+RDF_RESTRICTIONS = {"ObjectSomeValuesFrom": iri_node(OWL.someValuesFrom),
+                    "ObjectAllValuesFrom": iri_node(OWL.allValuesFrom)}
+RDF_SET_CONSTRUCTS = {"ObjectIntersectionOf": iri_node(OWL.intersectionOf), "ObjectUnionOf": iri_node(OWL.unionOf)}
+
+
+def expand(identifier, prefixes=PREFIXES):
+    """
+    Expands a CURIE, label or IRI to its IRI. Spaces are percent-encoded as robot does.
+
+    Params:
+        identifier: CURIE (such as UBERON:0001954), IRI (optionally in <>) or label (optionally in single quotes)
+        prefixes: prefix name to IRI prefix map. Unknown prefixes are expanded to OBO PURLs.
+    Returns: IRI
+    """
+    if identifier.startswith("<") and identifier.endswith(">"):
+        return identifier[1:-1]
+    if identifier.startswith("'") and identifier.endswith("'"):
+        identifier = identifier[1:-1]
+    if identifier in LABELS:
+        return LABELS[identifier]
+    if "://" in identifier:
+        return identifier.replace(" ", "%20")
+    prefix, sep, local_id = identifier.partition(":")
+    if not sep or not prefix.strip():
+        raise ValueError("Unknown entity: " + identifier)
+    if prefix in prefixes:
+        return (prefixes[prefix] + local_id).replace(" ", "%20")
+    return (OBO_PURL + prefix + "_" + local_id).replace(" ", "%20")
+
+
+class ExpressionParser(object):
+    """
+    Parses Manchester syntax class expressions to the class expression trees of parse_ofn.
+    """
+
+    def __init__(self, expression, prefixes=PREFIXES):
+        self.tokens = TOKEN_PATTERN.findall(expression)
+        self.position = 0
+        self.prefixes = prefixes
+        self.classes = set()
+        self.object_properties = set()
+
+    def parse(self):
+        expression = self.parse_union()
+        if self.position != len(self.tokens):
+            raise ValueError("Unexpected token '{}' in: {}".format(self.tokens[self.position], " ".join(self.tokens)))
+        return expression
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise ValueError("Unexpected end of expression: " + " ".join(self.tokens))
+        self.position += 1
+        return token
+
+    def parse_union(self):
+        operands = [self.parse_intersection()]
+        while self.peek() == "or":
+            self.next()
+            operands.append(self.parse_intersection())
+        return operands[0] if len(operands) == 1 else tuple(["ObjectUnionOf"] + operands)
+
+    def parse_intersection(self):
+        operands = [self.parse_primary()]
+        while self.peek() == "and":
+            self.next()
+            operands.append(self.parse_primary())
+        return operands[0] if len(operands) == 1 else tuple(["ObjectIntersectionOf"] + operands)
+
+    def parse_primary(self):
+        token = self.next()
+        if token == "(":
+            expression = self.parse_union()
+            if self.next() != ")":
+                raise ValueError("Missing ')' in: " + " ".join(self.tokens))
+            return expression
+        if token == "not":
+            return "ObjectComplementOf", self.parse_primary()
+        if token in KEYWORDS or token == ")":
+            raise ValueError("Unexpected token '{}' in: {}".format(token, " ".join(self.tokens)))
+
+        iri = expand(token, self.prefixes)
+        if self.peek() in ("some", "only"):
+            restriction = "ObjectSomeValuesFrom" if self.next() == "some" else "ObjectAllValuesFrom"
+            self.object_properties.add(iri)
+            return restriction, ("IRI", iri), self.parse_primary()
+        self.classes.add(iri)
+        return "IRI", iri
+
+
+def literal(value):
+    return '"{}"'.format(value.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+def ofn_str(node):
+    """
+    Serializes an axiom, class expression, entity or literal tree in OWL functional syntax.
+    """
+    if node[0] == "IRI":
+        return "<{}>".format(node[1])
+    if node[0] == "Literal":
+        if node[2].startswith("@"):
+            return literal(node[1]) + node[2]
+        return literal(node[1]) if node[2] == XSD_STRING else "{}^^<{}>".format(literal(node[1]), node[2])
+    return "{}({})".format(node[0], " ".join(ofn_str(argument) for argument in node[1:]))
+
+
+class TemplateCompiler(object):
+    """
+    Compiles ROBOT template rows to the axiom trees of parse_ofn. Templates compiled with the same compiler are merged
+    into one ontology, so each axiom is generated once.
+    """
+
+    def __init__(self, prefixes=PREFIXES):
+        self.prefixes = prefixes
+        self.axioms = set()
+
+    def compile_template(self, template_path):
+        """
+        Streams the rows of the template and compiles them to axioms.
+
+        Params:
+            template_path: path of the ROBOT template TSV
+        Returns: generator of the axioms (including entity declarations) that were not generated before
+        """
+        with open(template_path) as fd:
+            rd = csv.reader(fd, delimiter="\t", quotechar='"')
+            headers = next(rd)
+            directives = [directive.strip() for directive in next(rd)]
+            id_column = directives.index("ID")
+            class_type_column = directives.index("CLASS_TYPE") if "CLASS_TYPE" in directives else None
+            for row in rd:
+                row = row + [""] * (len(directives) - len(row))
+                if not row[id_column].strip():
+                    continue
+                for axiom in self.compile_row(row, directives, id_column, class_type_column):
+                    if axiom not in self.axioms:
+                        self.axioms.add(axiom)
+                        yield axiom
+
+    def expand_property(self, directive, declarations):
+        prop = expand(directive.split(" ", 1)[1], self.prefixes)
+        declarations.append(("AnnotationProperty", prop))
+        return "IRI", prop
+
+    def class_expression(self, directive, value, declarations):
+        parser = ExpressionParser(directive.split(" ", 1)[1].replace("%", value), self.prefixes)
+        expression = parser.parse()
+        declarations.extend(("Class", iri) for iri in sorted(parser.classes))
+        declarations.extend(("ObjectProperty", iri) for iri in sorted(parser.object_properties))
+        return expression
+
+    def compile_row(self, row, directives, id_column, class_type_column):
+        """
+        Returns: list of the axioms of the row, entity declarations first
+        """
+        entity = "IRI", expand(row[id_column], self.prefixes)
+        declarations = [("Class", entity[1])]
+        class_type = SUBCLASS
+        if class_type_column is not None and row[class_type_column].strip():
+            class_type = row[class_type_column].strip().lower()
+        if class_type not in (SUBCLASS, EQUIVALENT):
+            raise ValueError("Unsupported CLASS_TYPE '{}' of {}".format(class_type, entity[1]))
+
+        # axioms of the last column, annotated by the following '>' columns: [axiom type, arguments, annotations]
+        column_axioms = list()
+        equivalent_expressions = list()
+        equivalent_annotations = set()
+        row_axioms = list()
+        for directive, value in zip(directives, row):
+            if not value.strip() or directive in ("ID", "CLASS_TYPE", ""):
+                if not directive.startswith(">"):
+                    column_axioms = list()
+                continue
+            if directive.startswith(">A "):
+                # annotates the axioms of the previous column, skipped if the previous column has no axiom
+                for axiom in column_axioms:
+                    axiom[2].add(("Annotation", self.expand_property(directive[1:], declarations),
+                                  ("Literal", value.strip(), XSD_STRING)))
+                continue
+
+            column_axioms = list()
+            if directive.startswith("A "):
+                column_axioms.append(["AnnotationAssertion",
+                                      [self.expand_property(directive, declarations), entity,
+                                       ("Literal", value, XSD_STRING)], set()])
+            elif directive.startswith("SC ") or (directive.startswith("C ") and class_type == SUBCLASS):
+                column_axioms.append(["SubClassOf", [entity, self.class_expression(directive, value, declarations)],
+                                      set()])
+            elif directive.startswith("EC "):
+                column_axioms.append(["EquivalentClasses",
+                                      [entity, self.class_expression(directive, value, declarations)], set()])
+            elif directive.startswith("C "):
+                equivalent_expressions.append(self.class_expression(directive, value, declarations))
+                # all C columns of an equivalent row share a single axiom
+                column_axioms.append([None, None, equivalent_annotations])
+            else:
+                raise ValueError("Unsupported template string: " + directive)
+            row_axioms.extend(column_axioms)
+
+        axioms = [("Declaration", (entity_type, ("IRI", iri))) for entity_type, iri in declarations
+                  if not iri.startswith(BUILTIN_NAMESPACES)]
+        for axiom_type, arguments, annotations in row_axioms:
+            if axiom_type:
+                axioms.append(tuple([axiom_type] + sorted(annotations) + arguments))
+        if equivalent_expressions:
+            expression = equivalent_expressions[0] if len(equivalent_expressions) == 1 else \
+                tuple(["ObjectIntersectionOf"] + equivalent_expressions)
+            axioms.append(tuple(["EquivalentClasses"] + sorted(equivalent_annotations) + [entity, expression]))
+        return axioms
+
+
+def rdf_term(node, triples, blank_nodes):
+    """
+    Maps an entity, literal or class expression tree to RDF (OWL 2 mapping to RDF graphs). Class expressions are added
+    to the triples as new blank node structures.
+
+    Params:
+        node: tree parsed by parse_ofn or compiled by TemplateCompiler
+        triples: list of triples to extend
+        blank_nodes: iterator of new blank node ids
+    Returns: ('IRI', iri), ('Literal', value, datatype IRI or @language) or ('BNode', id) term of the node
+    """
+    if node[0] in ("IRI", "Literal"):
+        return node
+
+    expression = "BNode", "n{}".format(next(blank_nodes))
+    operands = [rdf_term(argument, triples, blank_nodes) for argument in node[1:]]
+    if node[0] in RDF_RESTRICTIONS:
+        triples.append((expression, iri_node(RDF.type), iri_node(OWL.Restriction)))
+        triples.append((expression, iri_node(OWL.onProperty), operands[0]))
+        triples.append((expression, RDF_RESTRICTIONS[node[0]], operands[1]))
+    elif node[0] in RDF_SET_CONSTRUCTS:
+        operand_list = iri_node(RDF.nil)
+        for operand in reversed(operands):
+            item = "BNode", "n{}".format(next(blank_nodes))
+            triples.append((item, iri_node(RDF.first), operand))
+            triples.append((item, iri_node(RDF.rest), operand_list))
+            operand_list = item
+        triples.append((expression, iri_node(RDF.type), iri_node(OWL.Class)))
+        triples.append((expression, RDF_SET_CONSTRUCTS[node[0]], operand_list))
+    elif node[0] == "ObjectComplementOf":
+        triples.append((expression, iri_node(RDF.type), iri_node(OWL.Class)))
+        triples.append((expression, iri_node(OWL.complementOf), operands[0]))
+    else:
+        raise ValueError("Unsupported class expression: " + node[0])
+    return expression
+
+
+def axiom_triples(axiom, blank_nodes):
+    """
+    Maps an axiom tree to RDF triples. Annotated axioms are reified as owl:Axiom nodes the way robot (OWL API) writes
+    them.
+
+    Params:
+        axiom: tree parsed by parse_ofn or compiled by TemplateCompiler
+        blank_nodes: iterator of new blank node ids
+    Returns: list of (subject, predicate, object) triples of rdf_term terms
+    """
+    annotations = [argument for argument in axiom[1:] if argument[0] == "Annotation"]
+    arguments = [argument for argument in axiom[1:] if argument[0] != "Annotation"]
+    if axiom[0] == "Declaration":
+        return [(arguments[0][1], iri_node(RDF.type), RDF_DECLARATIONS[arguments[0][0]])]
+    if axiom[0] == "AnnotationAssertion":
+        predicate = arguments[0]
+        subject_node, object_node = arguments[1], arguments[2]
+    elif axiom[0] in RDF_CLASS_AXIOMS and len(arguments) == 2:
+        predicate = RDF_CLASS_AXIOMS[axiom[0]]
+        subject_node, object_node = arguments
+    else:
+        raise ValueError("Unsupported axiom: " + axiom[0])
+
+    triples = list()
+    subject = rdf_term(subject_node, triples, blank_nodes)
+    triples.append((subject, predicate, rdf_term(object_node, triples, blank_nodes)))
+    if annotations:
+        axiom_node = "BNode", "n{}".format(next(blank_nodes))
+        triples.append((axiom_node, iri_node(RDF.type), iri_node(OWL.Axiom)))
+        triples.append((axiom_node, iri_node(OWL.annotatedSource), subject))
+        triples.append((axiom_node, iri_node(OWL.annotatedProperty), predicate))
+        triples.append((axiom_node, iri_node(OWL.annotatedTarget), rdf_term(object_node, triples, blank_nodes)))
+        for annotation in annotations:
+            triples.append((axiom_node, annotation[1], rdf_term(annotation[2], triples, blank_nodes)))
+    return triples
+
+
+class OfnWriter(object):
+    """
+    Writes axioms to an ontology document in OWL functional syntax as they are compiled.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.output_path, "w")
+        for prefix in ["rdf", "rdfs", "xsd", "owl"]:
+            self.file.write("Prefix({}:=<{}>)\n".format(prefix, PREFIXES[prefix]))
+        self.file.write("\n\nOntology(\n")
+        return self
+
+    def write(self, axiom):
+        self.file.write(ofn_str(axiom) + "\n")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.write(")\n")
+        self.file.close()
+
+
+class RdfXmlWriter(object):
+    """
+    Writes the triples of axioms to an RDF/XML document as they are compiled, an rdf:Description per subject of each
+    axiom.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.file = None
+        self.blank_nodes = count()
+
+    def __enter__(self):
+        self.file = open(self.output_path, "w", encoding="utf-8")
+        self.file.write('<?xml version="1.0" encoding="utf-8"?>\n<rdf:RDF')
+        for prefix, namespace in XML_NAMESPACES.items():
+            self.file.write("\n    xmlns:{}={}".format(prefix, quoteattr(namespace)))
+        self.file.write(">\n    <owl:Ontology/>\n")
+        return self
+
+    @staticmethod
+    def node_attribute(term, name):
+        if term[0] == "BNode":
+            return 'rdf:nodeID="{}"'.format(term[1])
+        return "rdf:{}={}".format(name, quoteattr(term[1]))
+
+    @staticmethod
+    def property_element(predicate, value):
+        match = XML_QNAME_PATTERN.fullmatch(predicate[1])
+        if match is None:
+            raise ValueError("Property can't be written in RDF/XML: " + predicate[1])
+        namespace, local_name = match.groups()
+        prefix = next((prefix for prefix, iri in XML_NAMESPACES.items() if iri == namespace), None)
+        if prefix is None:
+            name, namespace_attribute = "ns:" + local_name, " xmlns:ns={}".format(quoteattr(namespace))
+        else:
+            name, namespace_attribute = prefix + ":" + local_name, ""
+        if value[0] != "Literal":
+            return "<{}{} {}/>".format(name, namespace_attribute, RdfXmlWriter.node_attribute(value, "resource"))
+        if value[2].startswith("@"):
+            value_attribute = "xml:lang={}".format(quoteattr(value[2][1:]))
+        else:
+            value_attribute = "rdf:datatype={}".format(quoteattr(value[2]))
+        return "<{0}{1} {2}>{3}</{0}>".format(name, namespace_attribute, value_attribute,
+                                             escape(value[1], {"\r": "&#13;"}))
+
+    def write(self, axiom):
+        descriptions = dict()
+        for subject, predicate, value in axiom_triples(axiom, self.blank_nodes):
+            descriptions.setdefault(subject, list()).append(self.property_element(predicate, value))
+        for subject, elements in descriptions.items():
+            self.file.write("    <rdf:Description {}>\n".format(self.node_attribute(subject, "about")))
+            for element in elements:
+                self.file.write("        {}\n".format(element))
+            self.file.write("    </rdf:Description>\n")
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.file.write("</rdf:RDF>\n")
+        self.file.close()
+
+
+def compile_templates(template_paths, output_path, prefixes=PREFIXES):
+    """
+    Compiles the templates to a single ontology, in OWL functional syntax if the output path is an .ofn file, in
+    RDF/XML (as robot does) otherwise.
+
+    Params:
+        template_paths: paths of the ROBOT templates
+        output_path: path of the output ontology
+        prefixes: prefix name to IRI prefix map
+    Returns: output path
+    """
+    compiler = TemplateCompiler(prefixes)
+    writer = OfnWriter(output_path) if output_path.endswith(".ofn") else RdfXmlWriter(output_path)
+    with writer:
+        for template_path in template_paths:
+            for axiom in compiler.compile_template(template_path):
+                writer.write(axiom)
+    print("{}: {} axioms".format(output_path, len(compiler.axioms)))
+    return output_path
+
+
+def get_all_targets(ontology_folder=ONTOLOGY_FOLDER, templates_folder=TEMPLATES_FOLDER):
+    """
+    Lists the new bridge and linkout targets of the Makefile.
+
+    Returns: list of (template paths, output path) pairs
+    """
+    targets = list()
+    for target in BRIDGE_TARGETS:
+        targets.append(([os.path.join(templates_folder, target + "_CCF_to_UBERON.tsv"),
+                         os.path.join(templates_folder, target + "_CCF_to_UBERON_source.tsv")],
+                        os.path.join(ontology_folder, "new-bridges", "new-uberon-bridge-to-" + target + ".owl")))
+    targets.append(([os.path.join(templates_folder, "linkouts.tsv")], os.path.join(ontology_folder, "linkouts.owl")))
+    return targets
+
+
+def compile_all(ontology_folder=ONTOLOGY_FOLDER, templates_folder=TEMPLATES_FOLDER, prefixes=PREFIXES):
+    """
+    Compiles all new bridge and linkout targets in parallel.
+    """
+    targets = get_all_targets(ontology_folder, templates_folder)
+    os.makedirs(os.path.join(ontology_folder, "new-bridges"), exist_ok=True)
+    with ProcessPoolExecutor() as executor:
+        futures = [executor.submit(compile_templates, template_paths, output_path, prefixes)
+                   for template_paths, output_path in targets]
+        return [future.result() for future in futures]
+
+
+def parse_ofn(text):
+    """
+    Parses the axioms of an ontology document in OWL functional syntax to trees of ('IRI', iri),
+    ('Literal', value, datatype IRI or @language) and (construct name, arguments...) tuples. Ontology IRI, imports and
+    ontology annotations are ignored.
+
+    Params:
+        text: ontology document in OWL functional syntax
+    Returns: list of axioms
+    """
+    tokens = [token for token in OFN_TOKEN_PATTERN.findall(text) if not token.startswith("#")]
+    prefixes = dict()
+    position = 0
+
+    def resolve(token):
+        if token.startswith("<"):
+            return token[1:-1]
+        prefix, sep, local_name = token.partition(":")
+        return prefixes[prefix] + local_name if sep and prefix in prefixes else token
+
+    def parse_node():
+        nonlocal position
+        token = tokens[position]
+        position += 1
+        if token.startswith('"'):
+            value = OFN_ESCAPE_PATTERN.sub(r"\1", token[1:-1])
+            if position < len(tokens) and tokens[position] == "^^":
+                position += 2
+                return "Literal", value, resolve(tokens[position - 1])
+            if position < len(tokens) and tokens[position].startswith("@"):
+                position += 1
+                return "Literal", value, tokens[position - 1]
+            return "Literal", value, XSD_STRING
+        if position < len(tokens) and tokens[position] == "(":
+            position += 1
+            arguments = list()
+            while tokens[position] != ")":
+                arguments.append(parse_node())
+            position += 1
+            return tuple([token] + arguments)
+        return "IRI", resolve(token)
+
+    axioms = list()
+    while position < len(tokens):
+        if tokens[position] == "Prefix":
+            # Prefix ( name: = <iri> )
+            prefixes[tokens[position + 2].rstrip(":")] = tokens[position + 4][1:-1]
+            position += 6
+        elif tokens[position] == "Ontology":
+            position += 2
+            while tokens[position] != ")":
+                if tokens[position].startswith("<"):
+                    # ontology and version IRIs
+                    position += 1
+                    continue
+                axiom = parse_node()
+                if axiom[0] not in ("Import", "Annotation"):
+                    axioms.append(axiom)
+            position += 1
+        else:
+            raise ValueError("Unexpected token '{}'".format(tokens[position]))
+    return axioms
+
+
+def to_rdf_graph(axioms, graph=None):
+    """
+    Maps the axioms parsed by parse_ofn to an anonymous ontology in an rdflib graph.
+
+    Params:
+        axioms: list of axioms
+        graph: rdflib graph to populate. A new graph is created if not provided.
+    Returns: rdflib graph
+    """
+    if graph is None:
+        graph = Graph()
+    blank_nodes = count()
+    graph_nodes = dict()
+
+    def to_rdflib(term):
+        if term[0] == "IRI":
+            return URIRef(term[1])
+        if term[0] == "BNode":
+            return graph_nodes.setdefault(term[1], BNode())
+        if term[2].startswith("@"):
+            return Literal(term[1], lang=term[2][1:])
+        return Literal(term[1], datatype=URIRef(term[2]))
+
+    graph.add((BNode(), RDF.type, OWL.Ontology))
+    for axiom in axioms:
+        for triple in axiom_triples(axiom, blank_nodes):
+            graph.add(tuple(to_rdflib(term) for term in triple))
+    return graph
+
+
+def read_ontology_graph(ontology_path):
+    """
+    Reads the ontology in OWL functional syntax or in any RDF format rdflib can parse (such as robot's RDF/XML output).
+
+    Params:
+        ontology_path: path of the ontology
+    Returns: rdflib graph
+    """
+    with open(ontology_path, "r") as f:
+        text = f.read()
+    if text.lstrip().startswith("Prefix(") or ontology_path.endswith(".ofn"):
+        return to_rdf_graph(parse_ofn(text))
+    graph = Graph()
+    graph.parse(data=text, format="xml" if text.lstrip().startswith("<") else None, publicID=ontology_path)
+    return graph
+
+
+def canonical_term(graph, term, visiting=frozenset()):
+    """
+    Serializes the term canonically. Blank nodes (class expressions and reified axioms) are serialized as their
+    sorted descriptions, the operands of intersections and unions as unordered sets. Plain literals are typed as
+    xsd:string as in RDF 1.1.
+
+    Params:
+        graph: rdflib graph
+        term: rdflib term
+        visiting: blank nodes that are being serialized, to detect cycles
+    Returns: canonical string of the term
+    """
+    if isinstance(term, Literal) and term.datatype is None and not term.language:
+        return Literal(str(term), datatype=XSD.string).n3()
+    if not isinstance(term, BNode):
+        return term.n3()
+    if term in visiting:
+        raise ValueError("Cyclic blank node structure is not supported")
+    visiting = visiting | {term}
+    description = list()
+    for predicate, value in graph.predicate_objects(term):
+        if predicate in (OWL.intersectionOf, OWL.unionOf):
+            operands = sorted(canonical_term(graph, operand, visiting) for operand in graph.items(value))
+            description.append("{} ({})".format(predicate.n3(), " ".join(operands)))
+        else:
+            description.append("{} {}".format(predicate.n3(), canonical_term(graph, value, visiting)))
+    return "[{}]".format("; ".join(sorted(description)))
+
+
+def canonical_triples(graph):
+    """
+    Lists the triples of the named subjects and the blank node structures that are not referenced by any triple
+    (such as the reified owl:Axiom nodes) in canonical form. The ontology header is ignored.
+
+    Params:
+        graph: rdflib graph
+    Returns: Counter of canonical triples
+    """
+    headers = set(graph.subjects(RDF.type, OWL.Ontology))
+    referenced = set(value for value in graph.objects() if isinstance(value, BNode))
+    triples = Counter()
+    for subject in set(graph.subjects()):
+        if subject in headers:
+            continue
+        if isinstance(subject, BNode):
+            if subject not in referenced:
+                triples[canonical_term(graph, subject)] += 1
+            continue
+        for predicate, value in graph.predicate_objects(subject):
+            triples[" ".join([subject.n3(), predicate.n3(), canonical_term(graph, value)])] += 1
+    return triples
+
+
+def check_equivalence(compiled_path, robot_output_path):
+    """
+    Compares the compiled ontology with the robot output of the same templates at the axiom (RDF graph) level. Both
+    ontologies can be in OWL functional syntax or RDF/XML.
+
+    Params:
+        compiled_path: path of the compiled ontology
+        robot_output_path: path of the ontology generated by robot from the same templates
+    Returns: True if both ontologies have the same axioms
+    """
+    compiled = canonical_triples(read_ontology_graph(compiled_path))
+    robot_output = canonical_triples(read_ontology_graph(robot_output_path))
+    only_compiled = compiled - robot_output
+    only_robot = robot_output - compiled
+    print("Common triples: {}".format(sum((compiled & robot_output).values())))
+    for name, triples in (("compiled ontology", only_compiled), ("robot output", only_robot)):
+        print("Triples only in {}: {}".format(name, sum(triples.values())))
+        for triple in sorted(triples)[:10]:
+            print("  " + triple)
+    return not only_compiled and not only_robot
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compiles ROBOT templates to OWL.')
+    parser.add_argument('-t', '--template', action='append', help="Path to ROBOT template, can be repeated")
+    parser.add_argument('-o', '--output', help="Path to output ontology")
+    parser.add_argument('--prefix', action='append', default=[], help="Additional prefix such as 'ex: http://ex.org/'")
+    parser.add_argument('--all', action='store_true', help="Compiles all new bridge and linkout targets in parallel")
+    parser.add_argument('-d', '--ontology_folder', default=ONTOLOGY_FOLDER,
+                        help="Output folder of the --all targets. Default is src/ontology")
+    parser.add_argument('--check', help="Path to robot output of the same templates to compare with")
+    args = parser.parse_args()
+
+    prefix_map = dict(PREFIXES)
+    for prefix_def in args.prefix:
+        name, sep, iri = prefix_def.partition(":")
+        prefix_map[name.strip()] = iri.strip()
+
+    if args.all:
+        compile_all(args.ontology_folder, TEMPLATES_FOLDER, prefix_map)
+    else:
+        compile_templates(args.template, args.output, prefix_map)
+        if args.check and not check_equivalence(args.output, args.check):
+            raise SystemExit(1)
@@ -0,0 +1,197 @@
+"""
+Structure graph change impact analysis. Compares two versions of an Allen structure graph
+(such as an old and a newly published http://api.brain-map.org/api/v2/structure_graph_download/1.json) and reports
+added, removed, renamed and re-parented structures, together with the template rows, bridge mappings and linkout rows
+that refer to the changed structures.
+
+Both structure graph files should be named after their graph id (1.json, 17.json ...) to resolve the namespace.
+"""
+
+import os
+import glob
+import hashlib
+import argparse
+import pandas as pd
+
+from relation_validator import read_csv_to_dict
+from structure_graph_utils import read_structure_graph
+from id_codec import encode, to_iri
+from bridge_coverage_report import get_bridge_mappings, format_mapping, BRIDGES_FOLDER, TEMPLATES_FOLDER
+
+
+LINKOUTS_FILE = "linkouts.tsv"
+BRIDGE_FILES = "uberon-bridge-to-*.obo"
+
+ADDED = "added"
+REMOVED = "removed"
+RENAMED = "renamed"
+REPARENTED = "re-parented"
+
+
+def hash_structure(structure):
+    """
+    Hashes the (name, acronym, parent) of a structure graph node.
+
+    Params:
+        structure: structure record read by read_structure_graph
+    Returns: hex digest of the node
+    """
+    node = "\t".join([structure["name"], str(structure["acronym"]), str(structure.get("parent_structure_id", ""))])
+    return hashlib.md5(node.encode("utf-8")).hexdigest()
+
+
+def snapshot(graph_json):
+    """
+    Reads the given structure graph and hashes its nodes.
+
+    Params:
+        graph_json: path of the structure graph json
+    Returns: dict of encoded structure id to (node hash, structure record)
+    """
+    return {structure["id"]: (hash_structure(structure), structure)
+            for structure in read_structure_graph(graph_json, encoded=True)}
+
+
+def diff_snapshots(old_snapshot, new_snapshot):
+    """
+    Compares two structure graph snapshots.
+
+    Params:
+        old_snapshot: snapshot of the old structure graph
+        new_snapshot: snapshot of the new structure graph
+    Returns: dict of encoded changed structure id to change record
+    """
+    changes = dict()
+    for structure_id, (new_hash, new_structure) in new_snapshot.items():
+        if structure_id not in old_snapshot:
+            changes[structure_id] = new_change_record(structure_id, [ADDED], None, new_structure)
+        elif old_snapshot[structure_id][0] != new_hash:
+            old_structure = old_snapshot[structure_id][1]
+            change_types = list()
+            if old_structure["name"] != new_structure["name"] or old_structure["acronym"] != new_structure["acronym"]:
+                change_types.append(RENAMED)
+            if old_structure.get("parent_structure_id") != new_structure.get("parent_structure_id"):
+                change_types.append(REPARENTED)
+            changes[structure_id] = new_change_record(structure_id, change_types, old_structure, new_structure)
+
+    for structure_id, (old_hash, old_structure) in old_snapshot.items():
+        if structure_id not in new_snapshot:
+            changes[structure_id] = new_change_record(structure_id, [REMOVED], old_structure, None)
+
+    return changes
+
+
+def new_change_record(structure_id, change_types, old_structure, new_structure):
+    old_structure = old_structure or dict()
+    new_structure = new_structure or dict()
+    return {"id": to_iri(structure_id),
+            "change": ", ".join(change_types),
+            "old_name": old_structure.get("name", ""),
+            "new_name": new_structure.get("name", ""),
+            "old_acronym": old_structure.get("acronym", ""),
+            "new_acronym": new_structure.get("acronym", ""),
+            "old_parent": get_parent_iri(old_structure),
+            "new_parent": get_parent_iri(new_structure)}
+
+
+def get_parent_iri(structure):
+    return to_iri(structure["parent_structure_id"]) if "parent_structure_id" in structure else ""
+
+
+def find_affected_template_rows(changes, templates_folder):
+    """
+    Lists the template and linkout rows of the changed structures.
+
+    Params:
+        changes: changed structures
+        templates_folder: folder of the ROBOT templates
+    Returns: list of affected rows
+    """
+    affected = list()
+    for template_path in sorted(glob.glob(os.path.join(templates_folder, "*.tsv"))):
+        template_name = os.path.basename(template_path)
+        headers, records = read_csv_to_dict(template_path, delimiter="\t", generated_ids=True)
+        for line_number in records:
+            row_id = str(records[line_number].get("ID", "")).strip()
+            if row_id and encode(row_id) in changes:
+                affected.append({"type": "linkout" if template_name == LINKOUTS_FILE else "template",
+                                 "file": template_name,
+                                 "line": line_number + 1,
+                                 "id": row_id,
+                                 "change": changes[encode(row_id)]["change"],
+                                 "detail": records[line_number].get("Label",
+                                                                    records[line_number].get("prefLabel", ""))})
+    return affected
+
+
+def find_affected_bridge_mappings(changes, bridges_folder):
+    """
+    Lists the bridge mappings of the changed structures.
+
+    Params:
+        changes: changed structures
+        bridges_folder: folder of the uberon-bridge-to-*.obo files
+    Returns: list of affected mappings
+    """
+    affected = list()
+    for bridge_path in sorted(glob.glob(os.path.join(bridges_folder, BRIDGE_FILES))):
+        for term_id, mapping in sorted(get_bridge_mappings(bridge_path).items(), key=lambda item: to_iri(item[0])):
+            if term_id in changes:
+                affected.append({"type": "bridge",
+                                 "file": os.path.basename(bridge_path),
+                                 "line": "",
+                                 "id": to_iri(term_id),
+                                 "change": changes[term_id]["change"],
+                                 "detail": format_mapping(mapping)})
+    return affected
+
+
+def report_structure_graph_changes(old_graph, new_graph, output_path, affected_output_path,
+                                   templates_folder=TEMPLATES_FOLDER, bridges_folder=BRIDGES_FOLDER):
+    """
+    Compares two structure graph versions and writes the changed structures and the affected rows to the given
+    outputs. Summary is printed to the console.
+
+    Params:
+        old_graph: path of the old structure graph json
+        new_graph: path of the new structure graph json
+        output_path: path of the structure changes TSV
+        affected_output_path: path of the affected rows TSV
+        templates_folder: folder of the ROBOT templates
+        bridges_folder: folder of the uberon-bridge-to-*.obo files
+    Returns: set of affected structure IRIs
+    """
+    changes = diff_snapshots(snapshot(old_graph), snapshot(new_graph))
+    affected = find_affected_template_rows(changes, templates_folder)
+    affected.extend(find_affected_bridge_mappings(changes, bridges_folder))
+
+    change_columns = ["id", "change", "old_name", "new_name", "old_acronym", "new_acronym", "old_parent",
+                      "new_parent"]
+    pd.DataFrame.from_records(sorted(changes.values(), key=lambda change: change["id"]), columns=change_columns) \
+        .to_csv(output_path, sep="\t", index=False)
+    affected_columns = ["type", "file", "line", "id", "change", "detail"]
+    pd.DataFrame.from_records(affected, columns=affected_columns).to_csv(affected_output_path, sep="\t", index=False)
+
+    print("=== Structure graph changes :")
+    for change_type in [ADDED, REMOVED, RENAMED, REPARENTED]:
+        print("{}: {}".format(change_type, len([change for change in changes.values()
+                                                if change_type in change["change"].split(", ")])))
+    print("=== Affected rows :")
+    for affected_type in ["template", "bridge", "linkout"]:
+        print("{}: {}".format(affected_type, len([row for row in affected if row["type"] == affected_type])))
+
+    return set(row["id"] for row in affected)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reports changes between two structure graph versions and the '
+                                                 'mappings affected by them.')
+    parser.add_argument('-i1', '--old', help="Path to old structure graph JSON file")
+    parser.add_argument('-i2', '--new', help="Path to new structure graph JSON file")
+    parser.add_argument('-o', '--output', help="Path to output structure changes TSV file")
+    parser.add_argument('-a', '--affected', help="Path to output affected rows TSV file")
+    parser.add_argument('-t', '--templates', default=TEMPLATES_FOLDER, help="Folder of the ROBOT templates")
+    parser.add_argument('-b', '--bridges', default=BRIDGES_FOLDER, help="Folder of the uberon-bridge-to-*.obo files")
+    args = parser.parse_args()
+
+    report_structure_graph_changes(args.old, args.new, args.output, args.affected, args.templates, args.bridges)
@@ -1,34 +1,52 @@
 import json
 import ntpath
 
+from id_codec import CODEC, OBO_PURL
+
 
 NAMESPACES = {"1.json": "http://purl.obolibrary.org/obo/MBA_",
               "17.json": "http://purl.obolibrary.org/obo/DMBA_",
               "10.json": "http://purl.obolibrary.org/obo/HBA_",
               "16.json": "http://purl.obolibrary.org/obo/DHBA_",
               "8.json": "http://purl.obolibrary.org/obo/PBA_"}
+# atlases with an uberon bridge (aba is the legacy atlas without a structure graph)
+ATLASES = ["aba", "mba", "dmba", "hba", "dhba", "pba"]
+
 
+def read_structure_graph(graph_json, encoded=False):
+    """
+    Reads the structure graph json as a flat list of structure records.
 
-def read_structure_graph(graph_json):
+    Params:
+        graph_json: path of the structure graph json, file name should be the graph id (such as 1.json)
+        encoded: if 'True', id and parent_structure_id of the records are encoded ids (see id_codec) instead of IRIs
+    Returns: list of structure records
+    """
     f = open(graph_json, 'r')
     j = json.loads(f.read())
     data_list = list()
     namespace = NAMESPACES[ntpath.basename(graph_json)]
     for root in j["msg"]:
-        tree_recurse(root, data_list, namespace)
+        tree_recurse(root, data_list, namespace, encoded)
     f.close()
     return data_list
 
 
-def tree_recurse(node, dl, namespace):
+def tree_recurse(node, dl, namespace, encoded=False):
     d = dict()
-    d["id"] = namespace + str(node["id"])
+    d["id"] = get_structure_id(namespace, node["id"], encoded)
     d["name"] = str(node["name"])
     d["acronym"] = node["acronym"]
     if node["parent_structure_id"]:
-        d["parent_structure_id"] = namespace + str(node["parent_structure_id"])
+        d["parent_structure_id"] = get_structure_id(namespace, node["parent_structure_id"], encoded)
     d["subclass_of"] = "UBERON:0002616"
     dl.append(d)
 
     for child in node["children"]:
-        tree_recurse(child, dl, namespace)
+        tree_recurse(child, dl, namespace, encoded)
+
+
+def get_structure_id(namespace, structure_id, encoded=False):
+    if encoded:
+        return CODEC.pack(namespace[len(OBO_PURL):].rstrip("_"), structure_id)
+    return namespace + str(structure_id)
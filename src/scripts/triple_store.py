@@ -0,0 +1,168 @@
+"""
+Triple store backends used by the reporting scripts to run SPARQL queries over ontology files.
+
+- rdflib: default backend, pure-Python in-memory graph and SPARQL engine.
+- oxigraph: optional fast backend on the embedded Rust SPARQL engine of pyoxigraph (pip install "pyoxigraph>=0.4").
+
+Both backends take the same ontology files and the same SPARQL queries. Query results are returned as a list of
+dicts (variable name -> string value) so that callers don't depend on the term types of the underlying library.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from rdflib import Graph
+from funowl.converters.functional_converter import to_python
+
+try:
+    import pyoxigraph
+except ImportError:
+    pyoxigraph = None
+
+
+RDFLIB_BACKEND = "rdflib"
+OXIGRAPH_BACKEND = "oxigraph"
+DEFAULT_BACKEND = RDFLIB_BACKEND
+
+# media types of the serialisations oxigraph can load natively, other formats are converted through rdflib
+OXIGRAPH_MEDIA_TYPES = {".owl": "application/rdf+xml",
+                        ".rdf": "application/rdf+xml",
+                        ".xml": "application/rdf+xml",
+                        ".ttl": "text/turtle",
+                        ".nt": "application/n-triples",
+                        ".nq": "application/n-quads",
+                        ".trig": "application/trig"}
+
+
+class TripleStore(ABC):
+
+    @abstractmethod
+    def load(self, ontology_path):
+        pass
+
+    @abstractmethod
+    def query(self, query):
+        pass
+
+
+class RdflibStore(TripleStore):
+    """
+    Runs queries on the rdflib in-memory graph.
+    """
+
+    def __init__(self, graph=None):
+        self.graph = graph if graph is not None else Graph()
+
+    def load(self, ontology_path):
+        try:
+            self.graph.parse(ontology_path)
+        except Exception:
+            # drop the triples of the failed parse
+            self.graph.remove((None, None, None))
+            read_ofn_file(ontology_path, self.graph)
+
+    def query(self, query):
+        qres = self.graph.query(query)
+        variables = [str(var) for var in qres.vars]
+        rows = list()
+        for row in qres:
+            rows.append({var: to_str(row[var]) for var in variables})
+        return rows
+
+    def __len__(self):
+        return len(self.graph)
+
+
+class OxigraphStore(TripleStore):
+    """
+    Runs queries on the embedded pyoxigraph store. Ontologies that oxigraph can't parse (such as OWL functional
+    syntax) are read with rdflib/FunOWL first and then bulk loaded as N-Triples.
+    """
+
+    def __init__(self):
+        if pyoxigraph is None:
+            raise ImportError("'{}' backend requires pyoxigraph>=0.4. Install it with "
+                              "'pip install \"pyoxigraph>=0.4\"'.".format(OXIGRAPH_BACKEND))
+        self.store = pyoxigraph.Store()
+
+    def load(self, ontology_path):
+        media_type = OXIGRAPH_MEDIA_TYPES.get(os.path.splitext(ontology_path)[1].lower())
+        if media_type:
+            try:
+                self.store.bulk_load(path=ontology_path, format=pyoxigraph.RdfFormat.from_media_type(media_type))
+                return
+            except (SyntaxError, ValueError):
+                self.store.clear()
+        graph = RdflibStore()
+        graph.load(ontology_path)
+        self.store.bulk_load(graph.graph.serialize(format="nt", encoding="utf-8"),
+                             format=pyoxigraph.RdfFormat.N_TRIPLES)
+
+    def query(self, query):
+        qres = self.store.query(query)
+        variables = [var.value for var in qres.variables]
+        rows = list()
+        for solution in qres:
+            rows.append({var: to_str(solution[var]) for var in variables})
+        return rows
+
+    def __len__(self):
+        return len(self.store)
+
+
+BACKENDS = {RDFLIB_BACKEND: RdflibStore,
+            OXIGRAPH_BACKEND: OxigraphStore}
+
+
+def to_str(term):
+    """
+    Converts an rdflib or pyoxigraph term to its plain string value (IRI without brackets, literal lexical form).
+
+    Params:
+        term: query result term, None if the variable is unbound
+    Returns: string value of the term or None
+    """
+    if term is None:
+        return None
+    if pyoxigraph is not None and isinstance(term, (pyoxigraph.NamedNode, pyoxigraph.BlankNode, pyoxigraph.Literal)):
+        return term.value
+    # rdflib terms are str subclasses holding the IRI, blank node id or literal lexical form
+    return str(term)
+
+
+def read_ofn_file(ont_path, graph=None):
+    """
+    Uses FunOWL to read ontology file in OWL functional syntax to rdflib graph.
+    This function works very slow, but does the job.
+    Params:
+        ont_path: path of the ontology file in ofn format.
+        graph: rdflib graph to populate. A new graph is created if not provided.
+
+    Returns: rdflib graph object.
+    """
+    print("Converting functional syntax to rdf with FunOWL...")
+    ont_doc = to_python(ont_path)
+    if graph is None:
+        graph = Graph()
+    ont_doc.to_rdf(graph)
+    print("RDF conversion completed!!!")
+
+    return graph
+
+
+def open_store(ontology_path, backend=DEFAULT_BACKEND):
+    """
+    Reads ontology file in any format from the given path into a triple store of the given backend.
+
+    Params:
+        ontology_path: file path to the ontology
+        backend: name of the store backend, one of BACKENDS
+    Returns: triple store
+    """
+    if backend not in BACKENDS:
+        raise ValueError("Unknown triple store backend '{}'. Available backends are: {}"
+                         .format(backend, ", ".join(BACKENDS)))
+    store = BACKENDS[backend]()
+    print("reading ontology file...")
+    store.load(ontology_path)
+    print("ontology file read")
+    return store